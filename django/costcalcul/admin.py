@@ -17,6 +17,10 @@ class RecipeAdmin(admin.ModelAdmin):
     # ✅ 상세 페이지에서 수정 가능하도록 설정
     fields = ("name", "store", "sales_price_per_item", "production_quantity_per_batch", "recipe_img")  
 
+    # ✅ 원가 값을 목록 쿼리 한 번으로 계산 (레시피마다 재료 조회 X)
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related("store").with_costs()
+
     # ✅ 총 원가(total_material_cost) 계산하여 표시
     def total_material_cost_display(self, obj):
         return f"{obj.total_material_cost:,.0f} 원" if obj.total_material_cost else "0 원"
@@ -45,6 +49,9 @@ class RecipeItemAdmin(admin.ModelAdmin):
     # ✅ RecipeItem에 존재하지 않는 필드를 fields에서 제거
     fields = ("recipe", "ingredient", "quantity_used", "unit")  # ✅ store, sales_price_per_item 등 제거
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related("recipe", "ingredient").with_costs()
+
     # ✅ 개별 재료 원가 계산하여 표시
     def material_cost_display(self, obj):
         return f"{obj.material_cost:,.0f} 원" if obj.material_cost else "0 원"
@@ -0,0 +1,93 @@
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from PIL import Image, ImageOps
+from .models import Recipe
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_WIDTHS = (160, 480)
+THUMBNAIL_QUALITY = 80
+THUMBNAIL_DIR = "recipe_images/thumbs"
+
+# 요청 스레드 밖에서 썸네일 생성 (gunicorn 워커당 2개)
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="recipe-thumbnails")
+
+
+def thumbnail_name(image_name, width):
+    """ recipe_images/abc.jpg → recipe_images/thumbs/abc_160.webp """
+    stem = os.path.splitext(os.path.basename(image_name))[0]
+    return f"{THUMBNAIL_DIR}/{stem}_{width}.webp"
+
+
+def thumbnail_urls(thumbnails):
+    """ {"160": 파일명} → {"160": URL} """
+    return {width: default_storage.url(name) for width, name in (thumbnails or {}).items()}
+
+
+def render_thumbnail(image, width):
+    """ 가로 width 이하로 줄인 WebP 바이트 (메타데이터 없이 픽셀만 저장) """
+    thumbnail = image.copy()
+    if thumbnail.width > width:
+        thumbnail.thumbnail((width, width * 10), Image.LANCZOS)
+
+    buffer = BytesIO()
+    thumbnail.save(buffer, format="WEBP", quality=THUMBNAIL_QUALITY, method=4)
+    return buffer.getvalue()
+
+
+def generate_recipe_thumbnails(recipe_id, image_name):
+    """
+    원본 이미지로 고정 폭 썸네일들을 만들어 저장하고 Recipe.recipe_thumbnails에 기록.
+    그 사이 이미지가 바뀌었으면 만든 썸네일은 지운다. 반환값: {폭: 파일명}
+    """
+    with default_storage.open(image_name, "rb") as original:
+        image = Image.open(original)
+        image = ImageOps.exif_transpose(image)  # 회전 정보는 픽셀에 반영한 뒤 EXIF는 버림
+        image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+
+    thumbnails = {}
+    for width in THUMBNAIL_WIDTHS:
+        name = thumbnail_name(image_name, width)
+        if default_storage.exists(name):
+            default_storage.delete(name)
+        thumbnails[str(width)] = default_storage.save(name, ContentFile(render_thumbnail(image, width)))
+
+    if not Recipe.objects.filter(id=recipe_id, recipe_img=image_name).update(recipe_thumbnails=thumbnails):
+        delete_thumbnail_files(thumbnails)
+    return thumbnails
+
+
+def _generate_in_background(recipe_id, image_name):
+    try:
+        generate_recipe_thumbnails(recipe_id, image_name)
+    except Exception:
+        logger.exception("레시피 썸네일 생성 실패: recipe=%s image=%s", recipe_id, image_name)
+    finally:
+        connection.close()  # 워커 스레드의 DB 연결 정리
+
+
+def schedule_recipe_thumbnails(recipe):
+    """ 커밋 후 백그라운드 스레드에서 썸네일 생성 (이미지가 없으면 무시) """
+    if not recipe.recipe_img or not recipe.recipe_img.name:
+        return
+    recipe_id, image_name = recipe.id, recipe.recipe_img.name
+    transaction.on_commit(lambda: _executor.submit(_generate_in_background, recipe_id, image_name))
+
+
+def delete_thumbnail_files(thumbnails):
+    for name in (thumbnails or {}).values():
+        try:
+            default_storage.delete(name)
+        except Exception:
+            logger.warning("레시피 썸네일 삭제 실패: %s", name)
+
+
+def discard_recipe_thumbnails(thumbnails):
+    """ 커밋 후 기존 썸네일 파일 삭제 (이미지 교체/삭제, 레시피 삭제 시) """
+    if thumbnails:
+        transaction.on_commit(lambda: delete_thumbnail_files(thumbnails))
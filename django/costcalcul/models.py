@@ -1,5 +1,8 @@
 from django.db import models
+from django.db.models import Case, ExpressionWrapper, F, OuterRef, Prefetch, Subquery, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce
 from store.models import Store
+from ingredients.models import COST_FIELD, ingredient_unit_cost
 import os
 from uuid import uuid4
 from decimal import Decimal
@@ -12,6 +15,76 @@ def recipe_image_upload_path(instance, filename):
     return os.path.join("recipe_images", new_filename)
 
 
+class RecipeQuerySet(models.QuerySet):
+    def with_items(self):
+        """ ✅ 레시피 조회용 공통 prefetch: recipe_items + 재료 + 재고를 쿼리 1번으로 함께 로드 """
+        return self.prefetch_related(
+            Prefetch("recipe_items", queryset=RecipeItem.objects.select_related("ingredient__inventory"))
+        )
+
+    def with_costs(self):
+        """
+        ✅ 원가 관련 값을 DB에서 한 번에 계산 (RecipeItem → Ingredient 조인 + Sum)
+        - db_total_material_cost: 총 재료비 (total_material_cost)
+        - db_material_cost_per_item: 개당 재료비 (material_cost_per_item)
+        - db_cost_ratio: 원가 비율 % (cost_ratio)
+        모델 속성은 이 값들이 있으면 그대로 사용한다.
+        """
+        item_cost = F("recipe_items__quantity_used") * ingredient_unit_cost("recipe_items__ingredient__")
+        per_item = ExpressionWrapper(F("db_total_material_cost") / F("production_quantity_per_batch"), output_field=COST_FIELD)
+        return self.annotate(
+            db_total_material_cost=Coalesce(Sum(item_cost, output_field=COST_FIELD), Value(0), output_field=COST_FIELD),
+        ).annotate(
+            db_material_cost_per_item=Case(
+                When(production_quantity_per_batch__gt=0, then=per_item),
+                default=Value(0),
+                output_field=COST_FIELD,
+            ),
+        ).annotate(
+            db_cost_ratio=Case(
+                When(
+                    sales_price_per_item__gt=0,
+                    then=ExpressionWrapper(
+                        F("db_material_cost_per_item") * 100 / Cast("sales_price_per_item", COST_FIELD),
+                        output_field=COST_FIELD,
+                    ),
+                ),
+                default=Value(0),
+                output_field=COST_FIELD,
+            ),
+        )
+
+
+class RecipeItemQuerySet(models.QuerySet):
+    def with_costs(self):
+        """
+        ✅ 재료별 원가와 레시피 내 비율을 DB에서 계산
+        - db_material_cost: 개별 재료 원가 (material_cost)
+        - db_material_ratio: 레시피 총 재료비 대비 비율 % (material_ratio)
+        레시피 총액은 상관 서브쿼리로 레시피의 모든 재료를 합산하므로, 이 쿼리셋을 재료 등으로 필터해도 비율이 유지된다.
+        """
+        item_cost = ExpressionWrapper(F("quantity_used") * ingredient_unit_cost("ingredient__"), output_field=COST_FIELD)
+        recipe_total = Subquery(
+            RecipeItem.objects.filter(recipe_id=OuterRef("recipe_id"))
+            .values("recipe_id")
+            .annotate(total=Sum(item_cost))
+            .values("total"),
+            output_field=COST_FIELD,
+        )
+        return self.annotate(
+            db_material_cost=item_cost,
+            db_recipe_total_cost=recipe_total,
+        ).annotate(
+            db_material_ratio=Case(
+                When(db_recipe_total_cost__gt=0, then=ExpressionWrapper(
+                    F("db_material_cost") * 100 / F("db_recipe_total_cost"), output_field=COST_FIELD
+                )),
+                default=Value(0),
+                output_field=COST_FIELD,
+            ),
+        )
+
+
 # 레시피(Recipe) 모델
 class Recipe(models.Model):
     id = models.UUIDField(default=uuid4, primary_key=True, editable=False)
@@ -20,28 +93,37 @@ class Recipe(models.Model):
     sales_price_per_item = models.FloatField(null=True, blank=True) # 레시피 1개당 판매가격
     production_quantity_per_batch = models.IntegerField(default=1) # 한번에 만드는 메뉴 갯수
     recipe_img = models.ImageField(upload_to=recipe_image_upload_path, null=True, blank=True)  # 이미지 필드 추가
+    recipe_thumbnails = models.JSONField(default=dict, blank=True)  # {폭: 썸네일 파일명} (costcalcul.images에서 생성)
     is_favorites = models.BooleanField(default=False)
     total_ingredient_cost = models.DecimalField(max_digits=10, decimal_places=2, default=0)  # 총 재료비
     production_cost = models.DecimalField(max_digits=10, decimal_places=2, default=0)  # 개당 원가
     created_at = models.DateTimeField(default=now, editable=False)
     updated_at = models.DateTimeField(auto_now=True)    
+
+    objects = RecipeQuerySet.as_manager()
     
     def __str__(self):
         return self.name
 
     @property
     def total_material_cost(self):
+        if hasattr(self, "db_total_material_cost"):  # Recipe.objects.with_costs()로 조회한 경우
+            return self.db_total_material_cost
         return sum(item.material_cost for item in self.recipe_items.all()) if self.recipe_items.exists() else 0
 
     @property
     def material_cost_per_item(self):
-        if self.production_quantity_per_batch and self.total_material_cost:
+        if hasattr(self, "db_material_cost_per_item"):
+            return self.db_material_cost_per_item
+        if self.production_quantity_per_batch > 0 and self.total_material_cost:
             return self.total_material_cost / self.production_quantity_per_batch
         return 0
 
     @property
     def cost_ratio(self):
         """ ✅ 원가 비율 계산 (Decimal 변환) """
+        if hasattr(self, "db_cost_ratio"):
+            return self.db_cost_ratio
         if self.sales_price_per_item and self.material_cost_per_item:
             return (self.material_cost_per_item / Decimal(self.sales_price_per_item)) * 100  # ✅ Decimal 변환
         return 0
@@ -53,18 +135,25 @@ class RecipeItem(models.Model):
     ingredient = models.ForeignKey("ingredients.Ingredient", on_delete=models.CASCADE)
     quantity_used = models.DecimalField(max_digits=10, decimal_places=2)
     unit = models.CharField(max_length=2, choices=[('mg', 'Milligram'), ('ml', 'Milliliter'), ('ea', 'Each')])
+
+    objects = RecipeItemQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.ingredient.name} in {self.recipe.name}"
 
     @property
     def material_cost(self):
         """ ✅ 개별 재료 원가 계산 """
+        if hasattr(self, "db_material_cost"):  # RecipeItem.objects.with_costs()로 조회한 경우
+            return self.db_material_cost
         if self.ingredient.unit_cost and self.quantity_used:
             return self.ingredient.unit_cost * self.quantity_used
         return 0
 
     @property
     def material_ratio(self):
+        if hasattr(self, "db_material_ratio"):
+            return self.db_material_ratio
         total_cost = self.recipe.total_material_cost
         if total_cost:
             return (self.material_cost / total_cost) * 100
@@ -2,11 +2,9 @@ from rest_framework import serializers
 from .models import Recipe, RecipeItem
 from inventory.models import Inventory
 from ingredients.models import Ingredient  
-from django.shortcuts import get_object_or_404
 from decimal import Decimal
-from .utils import calculate_recipe_cost
+from .utils import compute_recipe_costs
 import logging
-from django.db import transaction
 from rest_framework import serializers
 from .recipe_item_serializers import RecipeItemSerializer
 
@@ -59,95 +57,53 @@ class RecipeSerializer(serializers.ModelSerializer):
             instance.recipe_img = validated_data["recipe_img"]
             # print(f" 이미지 저장됨: {instance.recipe_img}")
 
-        #  재료 구매량 변경 시, 기존 값 백업 (프론트에서 purchase_quantity 없이도 작동)
-        ingredients_data = validated_data.get("ingredients", [])
-        for ing in ingredients_data:
-            ingredient_id = ing.get("ingredient_id")
-            required_amount = Decimal(str(ing.get("required_amount", 0)))
-
-            if ingredient_id:
-                ingredient = get_object_or_404(Ingredient, id=ingredient_id)
-
-                # DB에서 최신 값을 불러와 비교
-                latest_ingredient = Ingredient.objects.get(id=ingredient_id)
-                old_qty = latest_ingredient.original_stock_before_edit
-                current_qty = latest_ingredient.purchase_quantity
-
-                if old_qty and current_qty < old_qty:
-                    # print("original_stock 감소 감지, used_stock 초기화 적용")
-                    required_amount = Decimal("0.0")
-
-                # required_amount 반영
-                ing["required_amount"] = float(required_amount)
-
+        # RecipeItem 변경은 StoreRecipeDetailView.put에서 기존 항목과 비교해 일괄 반영
         instance.save()
         return instance
 
         
     def create(self, validated_data):
-        ingredients_data = validated_data.pop('ingredients', [])  
-        # print(f" [validated_data]: {validated_data}")
-        # print(f" [ingredients_data]: {ingredients_data}")
-        recipe = Recipe.objects.create(**validated_data)
-
-        # print(f" [레시피 생성] 이름: {recipe.name}, 총 재료 수: {len(ingredients_data)}")
-
-        ingredient_costs = []
-
-        for idx, ingredient_data in enumerate(ingredients_data, 1):
-            # print(f"\n [#{idx}] ingredient_data:", ingredient_data)
-
-            try:
-                ingredient = get_object_or_404(Ingredient, id=ingredient_data["ingredient_id"])
-                # print(f" Ingredient 조회 성공: {ingredient.name}")
-            except:
-                # print(f" Ingredient 조회 실패: ID = {ingredient_data.get('ingredient_id')}")
+        """
+        레시피 생성 (StoreRecipeListView.post의 transaction.atomic 안에서 호출)
+        재료 일괄 조회 → 재고 일괄 생성(이미 있으면 유지) → 원가 계산 후 레시피 INSERT → RecipeItem 일괄 INSERT
+        """
+        ingredients_data = validated_data.pop('ingredients', [])
+        ingredients = Ingredient.objects.in_bulk([data["ingredient_id"] for data in ingredients_data])
+
+        items = []
+        for ingredient_data in ingredients_data:
+            ingredient = ingredients.get(ingredient_data["ingredient_id"])
+            if ingredient is None:  # 없는 재료는 건너뜀
                 continue
 
-            required_amount = Decimal(str(ingredient_data.get("quantity_used", 0)))
-            unit = ingredient_data.get("unit", ingredient.unit)
-
-            inventory, created = Inventory.objects.get_or_create(
+            items.append(RecipeItem(
                 ingredient=ingredient,
-                defaults={"remaining_stock": ingredient.purchase_quantity}
-            )
-
-            RecipeItem.objects.create(
-                recipe=recipe,
-                ingredient=ingredient,
-                quantity_used=required_amount,
-                unit=unit
-            )
-            # print(f" RecipeItem 생성 완료: {ingredient.name}, 사용량: {required_amount}, 단위: {unit}")
-
-            ingredient_costs.append({
-                "ingredient_id": str(ingredient.id),
-                "ingredient_name": ingredient.name,
-                "unit_price": ingredient.unit_cost,  
-                "quantity_used": required_amount,
-                "unit": unit
-            })
-
-        #  원가 계산 후 DB에 저장
-        cost_data = calculate_recipe_cost(
-            ingredients=ingredient_costs,
-            sales_price_per_item=recipe.sales_price_per_item,  
-            production_quantity_per_batch=recipe.production_quantity_per_batch  
+                quantity_used=Decimal(str(ingredient_data.get("quantity_used", 0))),
+                unit=ingredient_data.get("unit", ingredient.unit),
+            ))
+
+        # 재고가 없는 재료만 구매량 기준으로 재고 생성
+        Inventory.objects.bulk_create(
+            [Inventory(ingredient=item.ingredient, remaining_stock=item.ingredient.purchase_quantity) for item in items],
+            ignore_conflicts=True,
         )
 
+        #  원가 계산 (조회한 재료 단가로 메모리에서 계산) 후 레시피와 함께 저장
+        total_cost, cost_per_item = compute_recipe_costs(
+            [(item.quantity_used, item.ingredient.unit_cost) for item in items],
+            validated_data.get("production_quantity_per_batch"),
+        )
+        recipe = Recipe.objects.create(
+            **validated_data,
+            total_ingredient_cost=total_cost,
+            production_cost=cost_per_item,
+        )
 
-        recipe.total_ingredient_cost = Decimal(str(cost_data["total_material_cost"]))
-        recipe.production_cost = Decimal(str(cost_data["cost_per_item"]))
-
-        with transaction.atomic():
-            Recipe.objects.filter(id=recipe.id).update(
-                total_ingredient_cost=recipe.total_ingredient_cost,
-                production_cost=recipe.production_cost
-            )
-
-        updated_recipe = Recipe.objects.get(id=recipe.id)
+        for item in items:
+            item.recipe = recipe
+        RecipeItem.objects.bulk_create(items)
 
-        return updated_recipe  # 시리얼라이저에 반영
+        return recipe
 
     def get_total_ingredient_cost(self, obj):
         """ 응답에 `total_ingredient_cost` 추가 (None 방지)"""
@@ -161,17 +117,39 @@ class RecipeSerializer(serializers.ModelSerializer):
         data = super().to_representation(instance)
         data["recipe_cost"] = data["recipe_cost"] if data["recipe_cost"] is not None else 0
 
-        recipe_items = RecipeItem.objects.filter(recipe=instance)
-        # print(f" [to_representation] 연결된 RecipeItem 개수: {recipe_items.count()}")
-        for item in recipe_items:
-            print(f" {item.ingredient.name} - {item.quantity_used}")
+        # Recipe.objects.with_items()로 조회했다면 prefetch된 항목 사용 (아니면 쿼리 1번)
+        recipe_items = instance.recipe_items.all()
+        logger.debug("레시피 %s 재료 %d개 직렬화", instance.id, len(recipe_items))
 
         data["ingredients"] = [
             {
-                "ingredient_id": str(item.ingredient.id),
+                "ingredient_id": str(item.ingredient_id),
                 "required_amount": item.quantity_used
             }
             for item in recipe_items
         ]
 
         return data
+
+
+
+#  원가 시뮬레이션 입력 (재료별 가격/변동률, 구매처별 변동률)
+class IngredientPriceChangeSerializer(serializers.Serializer):
+    ingredient_id = serializers.UUIDField()
+    purchase_price = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0, required=False, allow_null=True)
+    percent = serializers.DecimalField(max_digits=7, decimal_places=2, min_value=-100, required=False, allow_null=True)
+
+    def validate(self, data):
+        if data.get("purchase_price") is None and data.get("percent") is None:
+            raise serializers.ValidationError("purchase_price 또는 percent 중 하나는 필요합니다.")
+        return data
+
+
+class VendorPriceChangeSerializer(serializers.Serializer):
+    vendor = serializers.CharField()
+    percent = serializers.DecimalField(max_digits=7, decimal_places=2, min_value=-100)
+
+
+class CostSimulationSerializer(serializers.Serializer):
+    ingredients = IngredientPriceChangeSerializer(many=True, required=False, default=list)
+    vendors = VendorPriceChangeSerializer(many=True, required=False, default=list)
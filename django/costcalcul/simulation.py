@@ -0,0 +1,83 @@
+import numpy as np
+from ingredients.models import Ingredient
+from .models import Recipe, RecipeItem
+
+
+def _costs(item_recipe, item_ingredient, quantities, prices, purchase_quantities, production, sales_prices):
+    """ 재료 가격 배열 → 레시피별 (총 재료비, 개당 원가, 원가 비율 %) 배열 (calculate_recipe_cost와 같은 반올림) """
+    unit_costs = np.divide(prices, purchase_quantities, out=np.zeros_like(prices), where=purchase_quantities > 0)
+    item_costs = np.round(quantities * unit_costs[item_ingredient], 2)
+    totals = np.bincount(item_recipe, weights=item_costs, minlength=len(production))
+    per_item = np.round(totals / production, 2)
+    ratios = np.divide(per_item * 100, sales_prices, out=np.zeros_like(per_item), where=sales_prices > 0)
+    return totals, per_item, ratios
+
+
+def simulate_recipe_costs(store_id, ingredient_changes=(), vendor_changes=()):
+    """
+    가상의 재료 가격 변동에 따른 상점 전체 레시피의 원가 시뮬레이션 (DB 변경 없음).
+    - ingredient_changes: [{"ingredient_id", "purchase_price" 또는 "percent"}]
+    - vendor_changes: [{"vendor", "percent"}] (해당 구매처 재료 전체에 적용, 재료별 변경이 우선)
+    재료/레시피/레시피 항목을 한 번씩 조회한 뒤 numpy 배열 연산으로 한꺼번에 계산한다.
+    없는 재료 ID가 있으면 ValueError.
+    """
+    ingredients = list(
+        Ingredient.objects.filter(store_id=store_id)
+        .values_list("id", "vendor", "purchase_price", "purchase_quantity")
+    )
+    recipes = list(
+        Recipe.objects.filter(store_id=store_id).order_by("created_at")
+        .values_list("id", "name", "production_quantity_per_batch", "sales_price_per_item")
+    )
+    items = list(
+        RecipeItem.objects.filter(recipe__store_id=store_id)
+        .values_list("recipe_id", "ingredient_id", "quantity_used")
+    )
+
+    ingredient_index = {ingredient_id: i for i, (ingredient_id, *_) in enumerate(ingredients)}
+    recipe_index = {recipe_id: i for i, (recipe_id, *_) in enumerate(recipes)}
+
+    prices = np.array([float(price) for _, _, price, _ in ingredients], dtype=float)
+    purchase_quantities = np.array([float(quantity) for *_, quantity in ingredients], dtype=float)
+    production = np.array([max(quantity or 1, 1) for _, _, quantity, _ in recipes], dtype=float)
+    sales_prices = np.array([sales_price or 0 for *_, sales_price in recipes], dtype=float)
+
+    # 다른 상점의 재료를 쓰는 항목은 제외
+    items = [item for item in items if item[1] in ingredient_index]
+    item_recipe = np.array([recipe_index[recipe_id] for recipe_id, _, _ in items], dtype=int)
+    item_ingredient = np.array([ingredient_index[ingredient_id] for _, ingredient_id, _ in items], dtype=int)
+    quantities = np.array([float(quantity) for *_, quantity in items], dtype=float)
+
+    # 가상 가격: 구매처별 % → 재료별 % 또는 지정 가격
+    new_prices = prices.copy()
+    vendors = np.array([vendor or "" for _, vendor, _, _ in ingredients], dtype=object)
+    for change in vendor_changes:
+        matched = vendors == change["vendor"]
+        new_prices[matched] = prices[matched] * (1 + float(change["percent"]) / 100)
+
+    for change in ingredient_changes:
+        index = ingredient_index.get(change["ingredient_id"])
+        if index is None:
+            raise ValueError(f"재료를 찾을 수 없습니다: {change['ingredient_id']}")
+        if change.get("purchase_price") is not None:
+            new_prices[index] = float(change["purchase_price"])
+        else:
+            new_prices[index] = prices[index] * (1 + float(change["percent"]) / 100)
+
+    args = (item_recipe, item_ingredient, quantities)
+    _, current_per_item, current_ratios = _costs(*args, prices, purchase_quantities, production, sales_prices)
+    totals, per_item, ratios = _costs(*args, new_prices, purchase_quantities, production, sales_prices)
+
+    return [
+        {
+            "recipe_id": str(recipe_id),
+            "recipe_name": name,
+            "current_cost_per_item": round(float(current_per_item[i]), 2),
+            "current_cost_ratio": round(float(current_ratios[i]), 2),
+            "total_ingredient_cost": round(float(totals[i]), 2),
+            "cost_per_item": round(float(per_item[i]), 2),
+            "cost_ratio": round(float(ratios[i]), 2),
+            "cost_per_item_change": round(float(per_item[i] - current_per_item[i]), 2),
+        }
+        for i, (recipe_id, name, _, _) in enumerate(recipes)
+    ]
@@ -1,3 +1,286 @@
-from django.test import TestCase
+import io
+import shutil
+import tempfile
+from decimal import Decimal
+from PIL import Image
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from users.models import CustomUser
+from store.models import Store
+from ingredients.models import Ingredient
+from inventory.models import Inventory
+from costcalcul.models import Recipe, RecipeItem
+from costcalcul.images import generate_recipe_thumbnails
+from costcalcul.utils import compute_recipe_costs, recalculate_recipe_costs
 
-# Create your tests here.
+
+class RecipeCostRecalculationTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(email="owner@livflow.co.kr", password="password")
+        self.store = Store.objects.create(user=self.user, name="본점")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        self.milk = Ingredient.objects.create(store=self.store, name="우유", purchase_price=Decimal("3000"), purchase_quantity=Decimal("1000"), unit="ml")
+        self.beans = Ingredient.objects.create(store=self.store, name="원두", purchase_price=Decimal("20000"), purchase_quantity=Decimal("1000"), unit="g")
+        self.latte = Recipe.objects.create(store=self.store, name="라떼", production_quantity_per_batch=2)
+        RecipeItem.objects.create(recipe=self.latte, ingredient=self.milk, quantity_used=Decimal("200"), unit="ml")
+        RecipeItem.objects.create(recipe=self.latte, ingredient=self.beans, quantity_used=Decimal("20"), unit="mg")
+
+    def test_price_change_updates_stored_recipe_cost(self):
+        url = reverse("ingredient-detail", args=[self.store.id, self.milk.id])
+
+        response = self.client.put(url, {"ingredient_cost": "4000"}, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        self.latte.refresh_from_db()
+        # 우유 200ml × 4원 + 원두 20g × 20원 = 1200원, 2개 생산
+        self.assertEqual(self.latte.total_ingredient_cost, Decimal("1200.00"))
+        self.assertEqual(self.latte.production_cost, Decimal("600.00"))
+
+    def test_zero_production_gives_zero_cost_per_item(self):
+        self.latte.production_quantity_per_batch = 0
+        self.latte.save()
+
+        recalculate_recipe_costs(recipe_ids=[self.latte.id])
+
+        self.latte.refresh_from_db()
+        annotated = Recipe.objects.with_costs().get(id=self.latte.id)
+        self.assertEqual(self.latte.total_ingredient_cost, Decimal("1000.00"))
+        self.assertEqual(self.latte.production_cost, Decimal("0"))
+        self.assertEqual(Decimal(annotated.material_cost_per_item), Decimal("0"))
+        self.assertEqual(self.latte.material_cost_per_item, 0)
+        self.assertEqual(compute_recipe_costs([(Decimal("200"), Decimal("3"))], 0), (Decimal("600.00"), Decimal("0")))
+        self.assertEqual(compute_recipe_costs([(Decimal("200"), Decimal("3"))], None), (Decimal("600.00"), Decimal("600.00")))
+
+    def test_deleting_ingredient_updates_recipe_cost(self):
+        url = reverse("ingredient-detail", args=[self.store.id, self.beans.id])
+
+        self.client.delete(url)
+
+        self.latte.refresh_from_db()
+        self.assertEqual(self.latte.total_ingredient_cost, Decimal("600.00"))
+
+
+class RecipeCostAnnotationTests(TestCase):
+    def setUp(self):
+        user = CustomUser.objects.create_user(email="owner@livflow.co.kr", password="password")
+        self.store = Store.objects.create(user=user, name="본점")
+        milk = Ingredient.objects.create(store=self.store, name="우유", purchase_price=Decimal("3000"), purchase_quantity=Decimal("1000"), unit="ml")
+        beans = Ingredient.objects.create(store=self.store, name="원두", purchase_price=Decimal("20000"), purchase_quantity=Decimal("1000"), unit="g")
+        for i in range(3):
+            recipe = Recipe.objects.create(store=self.store, name=f"라떼{i}", production_quantity_per_batch=2, sales_price_per_item=1000)
+            RecipeItem.objects.create(recipe=recipe, ingredient=milk, quantity_used=Decimal("200"), unit="ml")
+            RecipeItem.objects.create(recipe=recipe, ingredient=beans, quantity_used=Decimal("20"), unit="mg")
+        Recipe.objects.create(store=self.store, name="빈 레시피")
+
+    def test_with_costs_matches_properties_in_one_query(self):
+        expected = {
+            recipe.name: (recipe.total_material_cost, recipe.material_cost_per_item, recipe.cost_ratio)
+            for recipe in Recipe.objects.all()
+        }
+
+        with self.assertNumQueries(1):
+            annotated = {
+                recipe.name: (recipe.total_material_cost, recipe.material_cost_per_item, recipe.cost_ratio)
+                for recipe in Recipe.objects.with_costs()
+            }
+
+        self.assertEqual(annotated.keys(), expected.keys())
+        for name, values in expected.items():
+            for annotated_value, value in zip(annotated[name], values):
+                self.assertAlmostEqual(Decimal(annotated_value), Decimal(value), places=4)
+        self.assertAlmostEqual(Decimal(annotated["라떼0"][2]), Decimal("50"), places=4)
+
+    def test_item_ratio_in_one_query(self):
+        with self.assertNumQueries(1):
+            ratios = sorted(float(item.material_ratio) for item in RecipeItem.objects.with_costs())
+
+        self.assertEqual([round(r, 2) for r in ratios], [40.0] * 3 + [60.0] * 3)
+
+    def test_item_ratio_is_kept_when_filtered(self):
+        # 필터로 남은 행이 아니라 레시피 전체 재료 기준 비율
+        ratios = {round(float(item.material_ratio), 2) for item in RecipeItem.objects.with_costs().filter(unit="ml")}
+
+        self.assertEqual(ratios, {60.0})
+
+
+class RecipeCreateTests(TestCase):
+    def setUp(self):
+        user = CustomUser.objects.create_user(email="owner@livflow.co.kr", password="password")
+        self.store = Store.objects.create(user=user, name="본점")
+        self.ingredients = [
+            Ingredient.objects.create(store=self.store, name=f"재료{i}", purchase_price=Decimal("1000"), purchase_quantity=Decimal("100"), unit="g")
+            for i in range(30)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+        self.url = reverse("store-recipes", args=[self.store.id])
+
+    def test_create_query_count_does_not_grow_with_ingredients(self):
+        payload = {
+            "recipe_name": "샐러드",
+            "recipe_cost": "5000",
+            "production_quantity": 3,
+            "is_favorites": "false",
+            "ingredients": [{"ingredient_id": str(i.id), "required_amount": "1.5"} for i in self.ingredients],
+        }
+
+        # SAVEPOINT, 재료 조회, 재고 INSERT, 레시피 INSERT, RecipeItem INSERT, RELEASE SAVEPOINT
+        with self.assertNumQueries(6):
+            response = self.client.post(self.url, payload, format="json")
+
+        self.assertEqual(response.status_code, 201)
+        recipe = Recipe.objects.get(id=response.json()["id"])
+        # 재료 30개 × 1.5g × 10원 = 450원, 3개 생산
+        self.assertEqual((recipe.total_ingredient_cost, recipe.production_cost), (Decimal("450.00"), Decimal("150.00")))
+        self.assertEqual(response.json()["total_ingredient_cost"], 450.0)
+        self.assertEqual(RecipeItem.objects.filter(recipe=recipe).count(), 30)
+        self.assertEqual(Inventory.objects.filter(ingredient__store=self.store).count(), 30)
+
+
+class RecipeUpdateTests(TestCase):
+    def setUp(self):
+        user = CustomUser.objects.create_user(email="owner@livflow.co.kr", password="password")
+        self.store = Store.objects.create(user=user, name="본점")
+        self.ingredients = [
+            Ingredient.objects.create(store=self.store, name=f"재료{i}", purchase_price=Decimal("1000"), purchase_quantity=Decimal("100"), unit="g")
+            for i in range(4)
+        ]
+        self.recipe = Recipe.objects.create(store=self.store, name="샐러드", production_quantity_per_batch=1)
+        self.items = [
+            RecipeItem.objects.create(recipe=self.recipe, ingredient=ingredient, quantity_used=Decimal("1"), unit="g")
+            for ingredient in self.ingredients[:3]
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+        self.url = reverse("recipe-detail", args=[self.store.id, self.recipe.id])
+
+    def test_put_applies_only_the_diff(self):
+        keep, change, remove, add = self.ingredients
+        payload = {
+            "recipe_name": "샐러드",
+            "ingredients": [
+                {"ingredient_id": str(keep.id), "required_amount": 1},
+                {"ingredient_id": str(change.id), "required_amount": 5},
+                {"ingredient_id": str(add.id), "required_amount": 2},
+            ],
+        }
+
+        response = self.client.put(self.url, payload, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        items = {item.ingredient_id: item for item in RecipeItem.objects.filter(recipe=self.recipe)}
+        self.assertEqual(set(items), {keep.id, change.id, add.id})
+        self.assertEqual(items[keep.id].id, self.items[0].id)
+        self.assertEqual(items[change.id].id, self.items[1].id)
+        self.assertEqual(items[change.id].quantity_used, Decimal("5"))
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.total_ingredient_cost, Decimal("80.00"))
+
+    def test_unknown_ingredient_is_not_found(self):
+        payload = {"ingredients": [{"ingredient_id": "00000000-0000-0000-0000-000000000000", "required_amount": 1}]}
+
+        response = self.client.put(self.url, payload, format="json")
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(RecipeItem.objects.filter(recipe=self.recipe).count(), 3)
+
+    def test_detail_query_count_does_not_grow_with_ingredients(self):
+        for i in range(10):
+            ingredient = Ingredient.objects.create(store=self.store, name=f"추가{i}", purchase_price=Decimal("100"), purchase_quantity=Decimal("10"), unit="g")
+            Inventory.objects.create(ingredient=ingredient, remaining_stock=10)
+            RecipeItem.objects.create(recipe=self.recipe, ingredient=ingredient, quantity_used=Decimal("1"), unit="g")
+
+        # 레시피 조회, recipe_items(+재료, 재고) prefetch
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url)
+
+        self.assertEqual(len(response.json()["ingredients"]), 13)
+
+
+class RecipeCostSimulationTests(TestCase):
+    def setUp(self):
+        user = CustomUser.objects.create_user(email="owner@livflow.co.kr", password="password")
+        self.store = Store.objects.create(user=user, name="본점")
+        self.milk = Ingredient.objects.create(store=self.store, name="우유", vendor="서울우유", purchase_price=Decimal("3000"), purchase_quantity=Decimal("1000"), unit="ml")
+        self.beans = Ingredient.objects.create(store=self.store, name="원두", vendor="원두상회", purchase_price=Decimal("20000"), purchase_quantity=Decimal("1000"), unit="g")
+        self.latte = Recipe.objects.create(store=self.store, name="라떼", production_quantity_per_batch=2, sales_price_per_item=4000)
+        RecipeItem.objects.create(recipe=self.latte, ingredient=self.milk, quantity_used=Decimal("200"), unit="ml")
+        RecipeItem.objects.create(recipe=self.latte, ingredient=self.beans, quantity_used=Decimal("20"), unit="mg")
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+        self.url = reverse("recipe-cost-simulation", args=[self.store.id])
+
+    def test_vendor_shock_and_price_override(self):
+        payload = {
+            "vendors": [{"vendor": "서울우유", "percent": 10}],
+            "ingredients": [{"ingredient_id": str(self.beans.id), "purchase_price": 30000}],
+        }
+
+        # 상점 소유권 확인, 재료, 레시피, 레시피 항목
+        with self.assertNumQueries(4):
+            response = self.client.post(self.url, payload, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        [result] = response.json()
+        # 현재: (200 × 3 + 20 × 20) / 2 = 500원, 시뮬레이션: (200 × 3.3 + 20 × 30) / 2 = 630원
+        self.assertEqual(result["current_cost_per_item"], 500.0)
+        self.assertEqual(result["cost_per_item"], 630.0)
+        self.assertEqual(result["cost_ratio"], 15.75)
+        self.milk.refresh_from_db()
+        self.assertEqual(self.milk.purchase_price, Decimal("3000.00"))
+
+    def test_unknown_ingredient_is_bad_request(self):
+        payload = {"ingredients": [{"ingredient_id": "00000000-0000-0000-0000-000000000000", "percent": 5}]}
+
+        response = self.client.post(self.url, payload, format="json")
+
+        self.assertEqual(response.status_code, 400)
+
+
+class RecipeThumbnailTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        user = CustomUser.objects.create_user(email="owner@livflow.co.kr", password="password")
+        self.store = Store.objects.create(user=user, name="본점")
+
+    def upload(self):
+        buffer = io.BytesIO()
+        exif = Image.Exif()
+        exif[0x010F] = "Camera"  # Make
+        Image.new("RGB", (1200, 800), "orange").save(buffer, format="JPEG", exif=exif)
+        return SimpleUploadedFile("menu.jpg", buffer.getvalue(), content_type="image/jpeg")
+
+    def test_thumbnails_are_resized_webp_without_metadata(self):
+        recipe = Recipe.objects.create(store=self.store, name="라떼", recipe_img=self.upload())
+
+        thumbnails = generate_recipe_thumbnails(recipe.id, recipe.recipe_img.name)
+
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.recipe_thumbnails, thumbnails)
+        self.assertEqual(set(thumbnails), {"160", "480"})
+        with default_storage.open(thumbnails["160"]) as f:
+            image = Image.open(f)
+            self.assertEqual((image.format, image.size), ("WEBP", (160, 107)))
+            self.assertFalse(image.getexif())
+
+    def test_replaced_image_discards_stale_thumbnails(self):
+        recipe = Recipe.objects.create(store=self.store, name="라떼", recipe_img=self.upload())
+        old_name = recipe.recipe_img.name
+        recipe.recipe_img = self.upload()
+        recipe.save()
+
+        thumbnails = generate_recipe_thumbnails(recipe.id, old_name)
+
+        self.assertFalse(any(default_storage.exists(name) for name in thumbnails.values()))
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.recipe_thumbnails, {})
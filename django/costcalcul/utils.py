@@ -2,6 +2,7 @@ import logging
 from decimal import Decimal, InvalidOperation
 from .models import Recipe, RecipeItem  # ✅ 기존 DB 값 가져오기 위해 추가
 from django.db.models import Sum
+from django.utils.timezone import now
 
 logger = logging.getLogger(__name__)
 
@@ -68,4 +69,60 @@ def get_total_used_quantity(ingredient):
         total=Sum('quantity_used')
     )["total"] or Decimal("0")
 
-    return total_used
\ No newline at end of file
+    return total_used
+
+
+def unit_cost_of(purchase_price, purchase_quantity):
+    """ Ingredient.unit_cost와 같은 단가 계산 (조회한 값만으로 계산할 때 사용) """
+    if purchase_quantity and purchase_price:
+        return purchase_price / purchase_quantity
+    return Decimal("0")
+
+
+def compute_recipe_costs(item_costs, production_quantity_per_batch):
+    """
+    [(사용량, 단가)] → (총 재료비, 개당 원가). calculate_recipe_cost와 같은 방식으로 반올림한다.
+    생산량이 0 이하면 개당 원가는 0 (Recipe.objects.with_costs()와 같은 규칙), 생산량이 없으면(None) 모델 기본값 1로 본다.
+    """
+    total = sum((round(Decimal(quantity_used) * Decimal(unit_cost), 2) for quantity_used, unit_cost in item_costs), Decimal("0"))
+    production_quantity = Decimal(1 if production_quantity_per_batch is None else production_quantity_per_batch)
+    per_item = round(total / production_quantity, 2) if production_quantity > 0 else Decimal("0")
+    return total, per_item
+
+
+def recalculate_recipe_costs(ingredient_ids=None, recipe_ids=None):
+    """
+    재료 가격/구매량이 바뀌었을 때 저장된 레시피 원가(total_ingredient_cost, production_cost) 재계산.
+    ingredient_ids: 해당 재료를 쓰는 레시피 전체, recipe_ids: 지정한 레시피.
+    영향받는 레시피의 모든 RecipeItem을 재료 가격과 함께 한 번에 조회하고, bulk_update로 저장한다.
+    반환값: 갱신한 레시피 수
+    """
+    if ingredient_ids is not None:
+        affected = RecipeItem.objects.filter(ingredient_id__in=ingredient_ids).values("recipe_id")
+    elif recipe_ids is not None:
+        affected = recipe_ids
+    else:
+        return 0
+
+    rows = RecipeItem.objects.filter(recipe_id__in=affected).values_list(
+        "recipe_id",
+        "recipe__production_quantity_per_batch",
+        "quantity_used",
+        "ingredient__purchase_price",
+        "ingredient__purchase_quantity",
+    )
+
+    items_by_recipe = {recipe_id: ([], None) for recipe_id in (recipe_ids or [])}
+    for recipe_id, production_quantity, quantity_used, purchase_price, purchase_quantity in rows:
+        item_costs, _ = items_by_recipe.get(recipe_id, ([], None))
+        item_costs.append((quantity_used, unit_cost_of(purchase_price, purchase_quantity)))
+        items_by_recipe[recipe_id] = (item_costs, production_quantity)
+
+    updated_at = now()
+    recipes = []
+    for recipe_id, (item_costs, production_quantity) in items_by_recipe.items():
+        total, per_item = compute_recipe_costs(item_costs, production_quantity)
+        recipes.append(Recipe(id=recipe_id, total_ingredient_cost=total, production_cost=per_item, updated_at=updated_at))
+
+    Recipe.objects.bulk_update(recipes, ["total_ingredient_cost", "production_cost", "updated_at"], batch_size=500)
+    return len(recipes)
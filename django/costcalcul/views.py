@@ -2,16 +2,21 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from .models import Recipe, RecipeItem
-from .serializers import RecipeSerializer
+from .serializers import RecipeSerializer, CostSimulationSerializer
+from .simulation import simulate_recipe_costs
+from .images import discard_recipe_thumbnails, schedule_recipe_thumbnails, thumbnail_urls
+from store.models import Store
 from django.shortcuts import get_object_or_404
 from ingredients.models import Ingredient  
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from inventory.models import Inventory
 from django.db import transaction
 from drf_yasg.utils import swagger_auto_schema
-from decimal import Decimal
+from decimal import Decimal, InvalidOperation
+from uuid import UUID
+from django.db.models import F
 import json
-from .utils import get_total_used_quantity
+from .utils import recalculate_recipe_costs
 # from pprint import pprint
 
 
@@ -31,6 +36,7 @@ class StoreRecipeListView(APIView):
                 "recipe_name": recipe.name,
                 "recipe_cost": recipe.sales_price_per_item if recipe.sales_price_per_item else None,
                 "recipe_img": recipe.recipe_img.url if recipe.recipe_img and hasattr(recipe.recipe_img, 'url') else None, 
+                "recipe_thumbnails": thumbnail_urls(recipe.recipe_thumbnails),  # {"160": URL, "480": URL} (생성 전이면 빈 객체)
                 "is_favorites": recipe.is_favorites,  
             }
             for recipe in recipes
@@ -105,6 +111,7 @@ class StoreRecipeListView(APIView):
                     store_id=store_id,
                     is_favorites=str(request.data.get("is_favorites", "false")).lower() == "true"
                 )
+                schedule_recipe_thumbnails(recipe)  # 커밋 후 백그라운드에서 썸네일 생성
 
                 recipe_img_url = recipe.recipe_img.url if recipe.recipe_img and recipe.recipe_img.name else None
 
@@ -136,37 +143,22 @@ class StoreRecipeDetailView(APIView):
     def get(self, request, store_id, recipe_id):
         # print(" [레시피 GET] 요청 들어옴:", store_id, recipe_id)
         """ 특정 레시피 상세 조회 """
-        recipe = get_object_or_404(Recipe, id=recipe_id, store_id=store_id)
-        ingredients = RecipeItem.objects.filter(recipe=recipe)
-        # print(f" 연결된 재료 개수: {ingredients.count()}")
+        recipe = get_object_or_404(Recipe.objects.with_items(), id=recipe_id, store_id=store_id)
 
         ingredients_data = []
-        for item in ingredients:
+        for item in recipe.recipe_items.all():
             ingredient = item.ingredient
             required_amount = item.quantity_used
 
-            # print(f" 재료: {ingredient.name}, 저장된 사용량: {required_amount}")
-            # print(f" 구매량: {ingredient.purchase_quantity}, 기존 구매량: {ingredient.original_stock_before_edit}")
-
-            inventory = Inventory.objects.filter(ingredient=ingredient).first()
-            if inventory:
-                original_stock = Decimal(str(ingredient.purchase_quantity))
-                remaining_stock = Decimal(str(inventory.remaining_stock))
-                used_stock = original_stock - remaining_stock
-
-                # print(f" used_stock: {used_stock}")
-                
-                if ingredient.purchase_quantity < ingredient.original_stock_before_edit:
-                    # print(" 구매량 감소 감지 → required_amount = 0 처리")
-                    required_amount = Decimal("0.0")
+            # 재고가 있는 재료의 구매량이 줄었으면 사용량 0으로 표시
+            if hasattr(ingredient, "inventory") and ingredient.purchase_quantity < ingredient.original_stock_before_edit:
+                required_amount = Decimal("0.0")
 
             ingredients_data.append({
                 "ingredient_id": str(ingredient.id),
                 "required_amount": float(required_amount)
             })
 
-
-
         # 이미지 예외 처리
         recipe_img_url = None
         if recipe.recipe_img and hasattr(recipe.recipe_img, 'url'):
@@ -203,6 +195,7 @@ class StoreRecipeDetailView(APIView):
         # print(f"📂 request.FILES: {request.FILES}")
         image_file = request.FILES.get('recipe_img')
         # print(f"📸 image_file: {image_file}")
+        image_changed = bool(image_file)
 
         # 이미지 필드 강제 삽입(request.data에 imgFILE은 들어가지 않기때문에 명시적으로 넣어줘야함)
         if image_file:
@@ -218,6 +211,7 @@ class StoreRecipeDetailView(APIView):
                 # print(f" 이미지 삭제 완료: {img_name}")
             request_data["recipe_img"] = None
             # print(" 이미지 삭제 요청 처리됨.")
+            image_changed = True
 
         # print(f"📦 request_data['recipe_img']: {request_data.get('recipe_img')}")
 
@@ -228,69 +222,81 @@ class StoreRecipeDetailView(APIView):
             except json.JSONDecodeError:
                 return Response({"error": "올바른 JSON 형식의 ingredients를 보내야 합니다."}, status=status.HTTP_400_BAD_REQUEST)
 
-        updated_ingredients = []
-
-        for ing in ingredients:
-            ingredient = get_object_or_404(Ingredient, id=ing.get("ingredient_id"))
-            inventory = Inventory.objects.filter(ingredient=ingredient).first()
-
-            required_amount = Decimal(str(ing.get("required_amount", 0)))
-
-            if inventory:
-                current_capacity = Decimal(str(ingredient.purchase_quantity))
-                remaining_stock = Decimal(str(inventory.remaining_stock))
-                total_used = get_total_used_quantity(ingredient)
-
-                estimated_old_capacity = current_capacity + total_used
-
-                # print(f"\n🧾 [디버깅] Ingredient: {ingredient.name}")
-                # print(f"📦 이전 구매량 추정: {estimated_old_capacity}, 현재 구매량: {current_capacity}")
-                # print(f"📏 기존 required_amount: {required_amount}, 총 사용량: {total_used}")
-
-                # 백업이 안 되어 있다면 현재 값을 백업
-                if ingredient.original_stock_before_edit == 0 and ingredient.purchase_quantity > 0:
-                    # print(f"📝 original_stock_before_edit 백업: {ingredient.purchase_quantity}")
-                    ingredient.original_stock_before_edit = ingredient.purchase_quantity
-                    ingredient.save()
-
-                # 초기화 조건
-                if current_capacity < estimated_old_capacity and required_amount != 0 and total_used == 0:
-                    # print("⚠️ 조건 충족 → required_amount 초기화")
-                    required_amount = Decimal("0.0")
-
-            ing["required_amount"] = float(required_amount)
-            updated_ingredients.append(ing)
+        # 제출된 재료 목록 → {ingredient_id: 사용량} (같은 재료가 여러 번 오면 마지막 값 사용)
+        try:
+            submitted = {
+                UUID(str(ing.get("ingredient_id"))): Decimal(str(ing.get("required_amount", 0)))
+                for ing in ingredients
+            }
+        except (AttributeError, ValueError, InvalidOperation):
+            return Response({"error": "ingredient_id와 required_amount가 올바르지 않습니다."}, status=status.HTTP_400_BAD_REQUEST)
 
+        # 재료 + 재고를 한 번에 조회
+        ingredient_map = Ingredient.objects.select_related("inventory").in_bulk(submitted.keys())
+        if len(ingredient_map) != len(submitted):
+            return Response({"error": "재료를 찾을 수 없습니다."}, status=status.HTTP_404_NOT_FOUND)
 
-        request_data["ingredients"] = updated_ingredients
+        request_data["ingredients"] = [
+            {"ingredient_id": str(ingredient_id), "required_amount": float(amount)}
+            for ingredient_id, amount in submitted.items()
+        ]
 
         # serializer에 FILES도 함께 넘김
         serializer = RecipeSerializer(instance=recipe, data=request_data, partial=partial)
 
         if not serializer.is_valid():
-            # print(f"serializer.errors: {serializer.errors}")
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-        
-        recipe = serializer.save()
-        
+
         with transaction.atomic():
             recipe.is_favorites = str(request.data.get("is_favorites", str(recipe.is_favorites).lower())).lower() == "true"
-            recipe.save()
-
-            RecipeItem.objects.filter(recipe=recipe).delete()
-
-            for ingredient_data in updated_ingredients:
-                ingredient = get_object_or_404(Ingredient, id=ingredient_data.get("ingredient_id"))
-                required_amount = Decimal(str(ingredient_data.get("required_amount", 0)))
-
-                RecipeItem.objects.create(
-                    recipe=recipe,
-                    ingredient=ingredient,
-                    quantity_used=required_amount,
-                )
-
-        # print(f"✅ 최종 저장된 이미지: {recipe.recipe_img}")
-        # print(f"✅ 최종 저장된 이미지 URL: {recipe.recipe_img.url if recipe.recipe_img else 'None'}")
+            if image_changed:  # 기존 썸네일은 커밋 후 삭제, 새 이미지면 다시 생성
+                discard_recipe_thumbnails(recipe.recipe_thumbnails)
+                recipe.recipe_thumbnails = {}
+            recipe = serializer.save()
+            if image_changed:
+                schedule_recipe_thumbnails(recipe)
+
+            # 재고가 있는 재료 중 구매량 백업이 안 된 재료는 현재 구매량을 백업
+            backup_ids = [
+                ingredient.id for ingredient in ingredient_map.values()
+                if hasattr(ingredient, "inventory") and ingredient.original_stock_before_edit == 0 and ingredient.purchase_quantity > 0
+            ]
+            if backup_ids:
+                Ingredient.objects.filter(id__in=backup_ids).update(original_stock_before_edit=F("purchase_quantity"))
+
+            # 기존 RecipeItem과 비교해서 바뀐 것만 반영
+            existing = {}
+            duplicates = []
+            for item in RecipeItem.objects.filter(recipe=recipe):
+                if item.ingredient_id in existing:
+                    duplicates.append(item.id)
+                else:
+                    existing[item.ingredient_id] = item
+
+            to_create, to_update = [], []
+            for ingredient_id, amount in submitted.items():
+                item = existing.get(ingredient_id)
+                if item is None:
+                    to_create.append(RecipeItem(
+                        recipe=recipe, ingredient_id=ingredient_id, quantity_used=amount,
+                        unit=ingredient_map[ingredient_id].unit,
+                    ))
+                elif item.quantity_used != amount:
+                    item.quantity_used = amount
+                    to_update.append(item)
+            to_delete = duplicates + [item.id for ingredient_id, item in existing.items() if ingredient_id not in submitted]
+
+            if to_delete:
+                RecipeItem.objects.filter(id__in=to_delete).delete()
+            if to_update:
+                RecipeItem.objects.bulk_update(to_update, ["quantity_used"])
+            if to_create:
+                RecipeItem.objects.bulk_create(to_create)
+
+            # 재료 구성이 바뀌었으면 저장된 원가 재계산
+            if to_delete or to_update or to_create or "production_quantity" in request_data:
+                recalculate_recipe_costs(recipe_ids=[recipe.id])
+                recipe.refresh_from_db(fields=["total_ingredient_cost", "production_cost"])
 
         return Response(RecipeSerializer(recipe).data, status=status.HTTP_200_OK)
 
@@ -318,6 +324,34 @@ class StoreRecipeDetailView(APIView):
                     inventory.save()
 
             recipe_items.delete()  # 사용한 RecipeItem 삭제
+            discard_recipe_thumbnails(recipe.recipe_thumbnails)
             recipe.delete()  # 레시피 삭제
 
-        return Response({"message": "레시피가 삭제되었으며, 사용한 재료의 재고가 복구되었습니다."}, status=status.HTTP_204_NO_CONTENT)
\ No newline at end of file
+        return Response({"message": "레시피가 삭제되었으며, 사용한 재료의 재고가 복구되었습니다."}, status=status.HTTP_204_NO_CONTENT)
+
+
+# ✅ 재료 가격 변동 시 레시피 원가 시뮬레이션 (DB 변경 없음)
+class RecipeCostSimulationView(APIView):
+
+    @swagger_auto_schema(
+        operation_summary="재료 가격 변동에 따른 전체 레시피 원가 시뮬레이션",
+        request_body=CostSimulationSerializer,
+        responses={200: "레시피별 현재/시뮬레이션 개당 원가와 원가 비율 반환", 400: "유효성 검사 실패"}
+    )
+    def post(self, request, store_id):
+        store = get_object_or_404(Store, id=store_id, user=request.user)
+
+        serializer = CostSimulationSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            results = simulate_recipe_costs(
+                store.id,
+                ingredient_changes=serializer.validated_data["ingredients"],
+                vendor_changes=serializer.validated_data["vendors"],
+            )
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(results, status=status.HTTP_200_OK)
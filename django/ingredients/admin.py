@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Ingredient
+from .models import Ingredient, IngredientPriceHistory
 from inventory.models import Inventory  # ✅ Inventory 모델 추가
 
 @admin.register(Ingredient)
@@ -11,7 +11,16 @@ class IngredientAdmin(admin.ModelAdmin):
 
     # ✅ Ingredient 저장 시 Inventory 자동 생성/업데이트
     def save_model(self, request, obj, form, change):
+        price_changed = change and {"purchase_price", "purchase_quantity"} & set(form.changed_data)
+        if price_changed:
+            # ✅ 이력이 없는 재료는 수정 전 가격을 먼저 기록
+            IngredientPriceHistory.record_baselines(Ingredient.objects.filter(pk=obj.pk))
+
         super().save_model(request, obj, form, change)  # ✅ 기본 저장 로직 실행
+
+        # ✅ 새 재료이거나 가격/구매량이 바뀌면 가격 이력 추가
+        if not change or price_changed:
+            IngredientPriceHistory.record([obj])
         
         # ✅ Inventory에 재료가 없으면 생성 (중복 방지)
         inventory, created = Inventory.objects.get_or_create(
@@ -25,3 +34,11 @@ class IngredientAdmin(admin.ModelAdmin):
         if not created:
             inventory.remaining_stock = obj.purchase_quantity
             inventory.save()
+
+
+@admin.register(IngredientPriceHistory)
+class IngredientPriceHistoryAdmin(admin.ModelAdmin):
+    list_display = ("ingredient", "effective_at", "purchase_price", "purchase_quantity")
+    list_filter = ("ingredient__store",)
+    search_fields = ("ingredient__name",)
+    ordering = ("-effective_at",)
@@ -0,0 +1,164 @@
+import csv
+import io
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils.timezone import now
+from ingredients.models import Ingredient, IngredientPriceHistory
+from inventory.models import Inventory
+from costcalcul.utils import recalculate_recipe_costs
+
+MAX_UPSERT_ROWS = 1000
+UPSERT_BATCH_SIZE = 500
+CSV_COLUMNS = ("ingredient_name", "ingredient_cost", "capacity", "unit")
+UPDATE_FIELDS = ["name", "purchase_price", "purchase_quantity", "unit", "vendor", "notes", "original_stock_before_edit"]
+
+
+class IngredientUpsertError(Exception):
+    """ 행별 오류 [{row, errors}]를 담은 예외 (아무것도 저장하지 않음) """
+
+    def __init__(self, errors):
+        super().__init__(errors)
+        self.errors = errors
+
+
+def read_csv_rows(uploaded_file):
+    """ 업로드된 CSV(ingredient_name,ingredient_cost,capacity,unit[,ingredient_id,shop,ingredient_detail] 헤더) → dict 리스트 """
+    text = io.TextIOWrapper(uploaded_file.file, encoding="utf-8-sig")
+    try:
+        reader = csv.DictReader(text)
+        missing = [column for column in CSV_COLUMNS if column not in (reader.fieldnames or [])]
+        if missing:
+            raise ValueError(f"CSV에 {', '.join(missing)} 컬럼이 필요합니다.")
+
+        rows = []
+        for row in reader:
+            row = {key: value.strip() for key, value in row.items() if key and isinstance(value, str)}
+            if not row.get("ingredient_id"):
+                row.pop("ingredient_id", None)  # 빈 칸 = 새 재료 (또는 이름으로 매칭)
+            rows.append(row)
+        return rows
+    except (csv.Error, UnicodeDecodeError) as e:
+        raise ValueError(str(e))
+
+
+def match_ingredients(store, rows):
+    """
+    검증된 행 → [(행, 기존 재료 또는 None)].
+    ingredient_id가 있으면 해당 재료, 없으면 같은 상점의 같은 이름 재료(가장 먼저 등록된 것)를 수정 대상으로 본다.
+    """
+    ids = {row["ingredient_id"] for row in rows if row.get("ingredient_id")}
+    names = {row["name"] for row in rows if not row.get("ingredient_id")}
+    existing = (
+        Ingredient.objects.filter(store=store)
+        .filter(Q(id__in=ids) | Q(name__in=names))
+        .select_related("inventory")
+        .select_for_update(of=("self",))  # 같은 재료를 동시에 수정하지 않도록 재료 행만 잠금 (재고는 아래에서 F()로 반영)
+        .order_by("created_at")
+    )
+
+    by_id, by_name = {}, {}
+    for ingredient in existing:
+        by_id[ingredient.id] = ingredient
+        by_name.setdefault(ingredient.name, ingredient)
+
+    matched, seen, errors = [], set(), []
+    for index, row in enumerate(rows):
+        if row.get("ingredient_id"):
+            ingredient = by_id.get(row["ingredient_id"])
+            if ingredient is None:
+                errors.append({"row": index, "errors": {"ingredient_id": ["이 상점의 재료가 아닙니다."]}})
+                continue
+        else:
+            ingredient = by_name.get(row["name"])
+
+        target = ingredient.id if ingredient else row["name"]
+        if target in seen:
+            errors.append({"row": index, "errors": {"non_field_errors": ["같은 재료가 여러 번 포함되어 있습니다."]}})
+            continue
+        seen.add(target)
+        matched.append((row, ingredient))
+
+    if errors:
+        raise IngredientUpsertError(errors)
+    return matched
+
+
+def apply_capacity_change(ingredient, inventory, new_quantity):
+    """ 재료 수정(PUT)과 같은 재고 반영: 용량 증가 → 남은 재고 증가(F식), 감소 → 기존 용량 백업 후 남은 재고 = 새 용량 """
+    old_quantity = Decimal(str(ingredient.purchase_quantity))
+    difference = Decimal(str(new_quantity)) - old_quantity
+    if inventory is None or not difference:
+        return False
+
+    if difference > 0:
+        # 읽은 값이 아니라 DB 값에 더함 (그 사이 재고 사용 API로 차감된 양을 덮어쓰지 않도록)
+        inventory.remaining_stock = F("remaining_stock") + difference
+    else:
+        if ingredient.original_stock_before_edit == 0:
+            ingredient.original_stock_before_edit = old_quantity
+        inventory.remaining_stock = new_quantity
+    return True
+
+
+def upsert_ingredients(store, rows):
+    """
+    검증된 행(IngredientUpsertSerializer.validated_data)들을 한 트랜잭션으로 생성/수정.
+    재료와 재고는 bulk_create/bulk_update로 저장하고, 가격/구매량이 바뀐 재료의 레시피 원가는 한 번에 재계산한다.
+    새 재료와 가격이 바뀐 재료는 가격 이력에 한 번에 추가한다.
+    반환값: (생성된 재료 목록, 수정된 재료 목록, 행 순서대로의 재료 목록)
+    """
+    with transaction.atomic():
+        matched = match_ingredients(store, rows)
+
+        created, updated, changed_inventories, price_changed_ids, baselines, ordered = [], [], [], [], [], []
+        updated_at = now()
+        for row, ingredient in matched:
+            fields = {key: value for key, value in row.items() if key != "ingredient_id"}
+
+            if ingredient is None:
+                ingredient = Ingredient(store=store, **fields)
+                created.append(ingredient)
+                ordered.append(ingredient)
+                continue
+
+            inventory = getattr(ingredient, "inventory", None)
+            if apply_capacity_change(ingredient, inventory, fields["purchase_quantity"]):
+                inventory.updated_at = updated_at  # bulk_update는 auto_now를 채우지 않음
+                changed_inventories.append(inventory)
+
+            old_price = (ingredient.purchase_price, ingredient.purchase_quantity)
+            if (fields["purchase_price"], fields["purchase_quantity"]) != old_price:
+                # 수정 전 가격 (이력이 없는 재료의 기준 이력용)
+                baselines.append(Ingredient(
+                    id=ingredient.id, created_at=ingredient.created_at,
+                    purchase_price=ingredient.purchase_price, purchase_quantity=ingredient.purchase_quantity,
+                ))
+                price_changed_ids.append(ingredient.id)
+            for key, value in fields.items():
+                setattr(ingredient, key, value)
+            updated.append(ingredient)
+            ordered.append(ingredient)
+
+        if created:
+            Ingredient.objects.bulk_create(created, batch_size=UPSERT_BATCH_SIZE)
+            Inventory.objects.bulk_create(
+                [Inventory(ingredient=ingredient, remaining_stock=ingredient.purchase_quantity) for ingredient in created],
+                batch_size=UPSERT_BATCH_SIZE,
+            )
+        if updated:
+            Ingredient.objects.bulk_update(updated, UPDATE_FIELDS, batch_size=UPSERT_BATCH_SIZE)
+        if changed_inventories:
+            Inventory.objects.bulk_update(changed_inventories, ["remaining_stock", "updated_at"], batch_size=UPSERT_BATCH_SIZE)
+        if price_changed_ids:
+            recalculate_recipe_costs(ingredient_ids=price_changed_ids)
+
+        # 새 재료와 가격/구매량이 바뀐 재료만 가격 이력에 추가 (이력이 없던 재료는 수정 전 가격부터)
+        IngredientPriceHistory.record_baselines(baselines)
+        price_changed = set(price_changed_ids)
+        IngredientPriceHistory.record(
+            created + [ingredient for ingredient in updated if ingredient.id in price_changed],
+            effective_at=updated_at,
+        )
+
+    return created, updated, ordered
@@ -1,8 +1,38 @@
 import uuid
 from django.db import models
+from django.db.models.functions import Cast
 from store.models import Store  
 from django.utils.timezone import now 
 
+COST_FIELD = models.DecimalField(max_digits=20, decimal_places=6)
+
+
+class DecimalDivide(models.Func):
+    """ a / b (Decimal). 로컬 SQLite에서는 정수로 저장된 값끼리 정수 나눗셈이 되지 않도록 실수로 변환 """
+    arg_joiner = " / "
+    template = "(%(expressions)s)"
+    output_field = COST_FIELD
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        numerator, denominator = self.get_source_expressions()
+        clone = self.copy()
+        clone.set_source_expressions([Cast(numerator, models.FloatField()), denominator])
+        return super(DecimalDivide, clone).as_sqlite(compiler, connection, **extra_context)
+
+
+def ingredient_unit_cost(prefix=""):
+    """ Ingredient.unit_cost(구매가 / 구매량, 없으면 0)와 같은 값을 계산하는 SQL 식 """
+    price, quantity = models.F(f"{prefix}purchase_price"), models.F(f"{prefix}purchase_quantity")
+    return models.Case(
+        models.When(
+            models.Q(**{f"{prefix}purchase_quantity__gt": 0}),
+            then=DecimalDivide(price, quantity),
+        ),
+        default=models.Value(0),
+        output_field=COST_FIELD,
+    )
+
+
 # 재료(Ingredient) 모델(모델 이름을 front랑 맞춰야하는데 너무 늦었음)
 class Ingredient(models.Model):
     id = models.UUIDField(default=uuid.uuid4, primary_key=True, editable=False)  #  UUID 사용
@@ -19,6 +49,12 @@ class Ingredient(models.Model):
     notes = models.TextField(blank=True, null=True)  # ingredient_detail
     original_stock_before_edit = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     created_at = models.DateTimeField(default=now, editable=False)
+
+    class Meta:
+        indexes = [
+            # ✅ 상점별 재료 목록(생성순) 조회용
+            models.Index(fields=["store", "created_at"], name="ingredient_store_created_idx"),
+        ]
     
     def __str__(self):
         return self.name
@@ -29,3 +65,65 @@ class Ingredient(models.Model):
         if self.purchase_quantity and self.purchase_price:
             return self.purchase_price / self.purchase_quantity
         return 0
+
+
+# ✅ 재료 가격 이력 (추가만 함, 수정/삭제 없음)
+class IngredientPriceHistory(models.Model):
+    ingredient = models.ForeignKey(Ingredient, related_name="price_history", on_delete=models.CASCADE)
+    effective_at = models.DateTimeField(default=now)
+    purchase_price = models.DecimalField(max_digits=10, decimal_places=2)
+    purchase_quantity = models.DecimalField(max_digits=10, decimal_places=2)
+
+    class Meta:
+        indexes = [
+            # ✅ 특정 시점 기준 가격 조회용 (재료별 최신 이력)
+            models.Index(fields=["ingredient", "effective_at"], name="ingredient_price_eff_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.ingredient_id} - {self.purchase_price}/{self.purchase_quantity} ({self.effective_at})"
+
+    @property
+    def unit_cost(self):
+        if self.purchase_quantity and self.purchase_price:
+            return self.purchase_price / self.purchase_quantity
+        return 0
+
+    @classmethod
+    def record_baselines(cls, ingredients):
+        """
+        가격을 바꾸기 전에 호출: 이력이 없는 재료(이력 기능 이전에 등록된 재료)는 바뀌기 전 가격을 등록 시각 기준으로 추가.
+        넘기는 재료 객체에는 수정 전 가격/구매량이 들어 있어야 한다.
+        """
+        ingredients = list(ingredients)
+        if not ingredients:
+            return []
+        recorded = set(
+            cls.objects.filter(ingredient_id__in=[ingredient.id for ingredient in ingredients])
+            .values_list("ingredient_id", flat=True)
+            .distinct()
+        )
+        return cls.objects.bulk_create([
+            cls(
+                ingredient_id=ingredient.id,
+                effective_at=ingredient.created_at,
+                purchase_price=ingredient.purchase_price,
+                purchase_quantity=ingredient.purchase_quantity,
+            )
+            for ingredient in ingredients
+            if ingredient.id not in recorded
+        ])
+
+    @classmethod
+    def record(cls, ingredients, effective_at=None):
+        """ 재료들의 현재 가격/구매량을 이력에 추가 (INSERT 1번) """
+        effective_at = effective_at or now()
+        return cls.objects.bulk_create([
+            cls(
+                ingredient=ingredient,
+                effective_at=effective_at,
+                purchase_price=ingredient.purchase_price,
+                purchase_quantity=ingredient.purchase_quantity,
+            )
+            for ingredient in ingredients
+        ])
@@ -19,8 +19,16 @@ class IngredientSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ["unit_cost", "store"]
 
-    # ✅ 단가 계산 함수 활용
+    # ✅ 단가 계산 함수 활용 (목록/상세와 같이 소수점 둘째 자리까지)
     def get_unit_cost(self, obj):
         return calculate_unit_price(obj.purchase_price, obj.purchase_quantity)
 
 
+
+
+class IngredientUpsertSerializer(IngredientSerializer):
+    """ 재료 일괄 등록/수정용 (ingredient_id가 있으면 해당 재료 수정, 없으면 이름으로 매칭 후 수정 또는 생성) """
+    ingredient_id = serializers.UUIDField(required=False)
+
+    class Meta(IngredientSerializer.Meta):
+        fields = IngredientSerializer.Meta.fields + ["ingredient_id"]
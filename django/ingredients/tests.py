@@ -1,3 +1,241 @@
+from datetime import datetime
+from decimal import Decimal
+from django.core.files.uploadedfile import SimpleUploadedFile
+from unittest import mock
+from django.db.models import F
 from django.test import TestCase
+from django.utils.timezone import make_aware
+from django.urls import reverse
+from rest_framework.test import APIClient
+from users.models import CustomUser
+from store.models import Store
+from ingredients.models import Ingredient, IngredientPriceHistory
+from inventory.models import Inventory
+from costcalcul.models import Recipe, RecipeItem
 
-# Create your tests here.
+
+class StoreIngredientListTests(TestCase):
+    def setUp(self):
+        user = CustomUser.objects.create_user(email="owner@livflow.co.kr", password="password")
+        self.store = Store.objects.create(user=user, name="본점")
+        self.milk = Ingredient.objects.create(store=self.store, name="우유", vendor="서울우유", purchase_price=Decimal("1000"), purchase_quantity=Decimal("3"), unit="ml")
+        Ingredient.objects.create(store=self.store, name="원두", vendor="", purchase_price=Decimal("20000"), purchase_quantity=Decimal("0"), unit="g")
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+        self.url = reverse("store-ingredients", args=[self.store.id])
+
+    def test_list_is_a_single_projection_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+
+        milk, beans = response.json()
+        self.assertEqual(milk["ingredient_id"], str(self.milk.id))
+        self.assertEqual((milk["unit"], milk["shop"], milk["ingredient_detail"]), ("ml", "서울우유", None))
+        self.assertEqual(milk["unit_cost"], 333.33)
+        self.assertEqual((beans["unit_cost"], beans["shop"]), (0, None))
+
+    def test_unit_cost_format_matches_across_endpoints(self):
+        # 목록/상세/생성/수정 모두 단가는 소수점 둘째 자리까지, ingredient_id는 문자열
+        detail_url = reverse("ingredient-detail", args=[self.store.id, self.milk.id])
+        Inventory.objects.create(ingredient=self.milk, remaining_stock=Decimal("3"))
+
+        listed = self.client.get(self.url).json()[0]
+        detail = self.client.get(detail_url).json()
+        created = self.client.post(self.url, {
+            "ingredient_name": "설탕", "ingredient_cost": "1000", "capacity": "7", "unit": "g",
+        }, format="json").json()
+        updated = self.client.put(detail_url, {"ingredient_cost": "2000"}, format="json").json()
+
+        self.assertEqual((listed["ingredient_id"], listed["unit_cost"]), (str(self.milk.id), 333.33))
+        self.assertEqual((detail["ingredient_id"], detail["unit_cost"]), (str(self.milk.id), 333.33))
+        self.assertEqual(created["unit_cost"], 142.86)
+        self.assertEqual(updated["unit_cost"], 666.67)
+
+    def test_vendor_and_name_filters(self):
+        self.assertEqual([i["ingredient_name"] for i in self.client.get(self.url, {"vendor": "서울우유"}).json()], ["우유"])
+        self.assertEqual([i["ingredient_name"] for i in self.client.get(self.url, {"name": "원"}).json()], ["원두"])
+
+
+class IngredientUsagesTests(TestCase):
+    def setUp(self):
+        user = CustomUser.objects.create_user(email="owner@livflow.co.kr", password="password")
+        self.store = Store.objects.create(user=user, name="본점")
+        self.milk = Ingredient.objects.create(store=self.store, name="우유", purchase_price=Decimal("3000"), purchase_quantity=Decimal("1000"), unit="ml")
+        self.beans = Ingredient.objects.create(store=self.store, name="원두", purchase_price=Decimal("20000"), purchase_quantity=Decimal("1000"), unit="g")
+        self.sugar = Ingredient.objects.create(store=self.store, name="설탕", purchase_price=Decimal("1000"), purchase_quantity=Decimal("1000"), unit="g")
+        for name in ("라떼", "플랫화이트"):
+            recipe = Recipe.objects.create(store=self.store, name=name, production_quantity_per_batch=1)
+            RecipeItem.objects.create(recipe=recipe, ingredient=self.milk, quantity_used=Decimal("200"), unit="ml")
+            RecipeItem.objects.create(recipe=recipe, ingredient=self.beans, quantity_used=Decimal("20"), unit="g")
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+
+    def test_default_response_is_recipe_names(self):
+        url = reverse("ingredient-usages", args=[self.store.id, self.milk.id])
+
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+
+        self.assertEqual(sorted(response.json()), ["라떼", "플랫화이트"])
+
+    def test_detail_includes_cost_and_share_of_whole_recipe(self):
+        url = reverse("ingredient-usages", args=[self.store.id, self.milk.id])
+
+        with self.assertNumQueries(1):
+            latte, _ = self.client.get(url, {"detail": "true"}).json()
+
+        # 우유 200ml × 3원 = 600원, 원두 20g × 20원 = 400원 → 60%
+        self.assertEqual(latte["recipe_name"], "라떼")
+        self.assertEqual((latte["quantity_used"], latte["cost"], latte["share"]), (200.0, 600.0, 60.0))
+
+    def test_batch_answers_many_ingredients_in_one_query(self):
+        url = reverse("ingredient-usages-batch", args=[self.store.id])
+        ids = [str(self.milk.id), str(self.beans.id), str(self.sugar.id)]
+
+        with self.assertNumQueries(1):
+            response = self.client.get(url, {"ingredient_id": ids})
+
+        data = response.json()
+        self.assertEqual([len(data[i]) for i in ids], [2, 2, 0])
+        self.assertEqual(data[str(self.beans.id)][0]["share"], 40.0)
+
+    def test_batch_rejects_invalid_ids(self):
+        url = reverse("ingredient-usages-batch", args=[self.store.id])
+
+        self.assertEqual(self.client.get(url).status_code, 400)
+        self.assertEqual(self.client.get(url, {"ingredient_id": "x"}).status_code, 400)
+
+
+class IngredientBulkUpsertTests(TestCase):
+    def setUp(self):
+        user = CustomUser.objects.create_user(email="owner@livflow.co.kr", password="password")
+        self.store = Store.objects.create(user=user, name="본점")
+        self.milk = Ingredient.objects.create(store=self.store, name="우유", purchase_price=Decimal("3000"), purchase_quantity=Decimal("1000"), unit="ml")
+        Inventory.objects.create(ingredient=self.milk, remaining_stock=400)
+        self.latte = Recipe.objects.create(store=self.store, name="라떼", production_quantity_per_batch=1)
+        RecipeItem.objects.create(recipe=self.latte, ingredient=self.milk, quantity_used=Decimal("200"), unit="ml")
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+        self.url = reverse("ingredient-bulk-upsert", args=[self.store.id])
+
+    def row(self, name, cost, capacity, **extra):
+        return {"ingredient_name": name, "ingredient_cost": cost, "capacity": capacity, "unit": "g", **extra}
+
+    def test_creates_many_ingredients_with_inventory_in_few_queries(self):
+        rows = [self.row(f"재료{i}", 1000 + i, 500) for i in range(90)]
+
+        # 상점 확인, SAVEPOINT, 기존 재료 매칭, 재료 INSERT, 재고 INSERT, 가격 이력 INSERT, RELEASE (SQLite 배치 크기 안에서)
+        with self.assertNumQueries(7):
+            response = self.client.post(self.url, rows, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.json()["created"], response.json()["updated"]), (90, 0))
+        self.assertEqual(Inventory.objects.filter(ingredient__store=self.store, remaining_stock=500).count(), 90)
+
+    def test_price_update_syncs_inventory_and_recipe_cost(self):
+        rows = [self.row("우유", 4000, 1500, ingredient_id=str(self.milk.id)), self.row("설탕", 1000, 1000)]
+
+        # 가격이 바뀐 재료의 기준 이력 확인/추가(2번) 포함
+        with self.assertNumQueries(13):
+            response = self.client.post(self.url, rows, format="json")
+
+        self.assertEqual((response.json()["created"], response.json()["updated"]), (1, 1))
+        self.milk.refresh_from_db()
+        self.latte.refresh_from_db()
+        self.assertEqual(self.milk.purchase_price, Decimal("4000"))
+        self.assertEqual(self.milk.inventory.remaining_stock, 900)  # 용량 500 증가분만큼 남은 재고 증가
+        self.assertEqual(self.latte.total_ingredient_cost, Decimal("533.33"))  # 200ml × 4000/1500
+        self.assertEqual(list(self.milk.price_history.order_by("effective_at").values_list("purchase_price", flat=True)), [Decimal("3000"), Decimal("4000")])
+
+    def test_capacity_increase_keeps_stock_consumed_after_read(self):
+        from ingredients import imports
+        original = imports.apply_capacity_change
+
+        def consume_then_apply(ingredient, inventory, new_quantity):
+            # 재료를 읽은 뒤 저장하기 전에 POS에서 100 사용
+            Inventory.objects.filter(id=inventory.id).update(remaining_stock=F("remaining_stock") - 100)
+            return original(ingredient, inventory, new_quantity)
+
+        with mock.patch.object(imports, "apply_capacity_change", side_effect=consume_then_apply):
+            self.client.post(self.url, [self.row("우유", 3000, 1500, ingredient_id=str(self.milk.id))], format="json")
+
+        self.assertEqual(Inventory.objects.get(ingredient=self.milk).remaining_stock, 800)  # 400 - 100 + 500
+
+    def test_csv_matches_existing_ingredient_by_name(self):
+        content = "ingredient_name,ingredient_cost,capacity,unit,shop\n우유,3000,800,ml,서울우유\n".encode("utf-8")
+        upload = SimpleUploadedFile("prices.csv", content, content_type="text/csv")
+
+        response = self.client.post(self.url, {"file": upload}, format="multipart")
+
+        self.assertEqual(response.json()["ingredient_ids"], [str(self.milk.id)])
+        self.milk.refresh_from_db()
+        self.assertEqual((self.milk.vendor, self.milk.original_stock_before_edit), ("서울우유", Decimal("1000")))
+        self.assertEqual(self.milk.inventory.remaining_stock, 800)
+
+    def test_invalid_rows_save_nothing(self):
+        other = Ingredient.objects.create(store=Store.objects.create(user=self.store.user, name="지점"), name="원두", purchase_price=1, purchase_quantity=1, unit="g")
+        rows = [self.row("새 재료", 1000, 100), self.row("원두", 1, 1, ingredient_id=str(other.id)), self.row("설탕", "x", 1)]
+
+        response = self.client.post(self.url, rows, format="json")
+        self.assertEqual([e["row"] for e in response.json()["errors"]], [2])
+
+        response = self.client.post(self.url, rows[:2], format="json")
+        self.assertEqual(response.json()["errors"], [{"row": 1, "errors": {"ingredient_id": ["이 상점의 재료가 아닙니다."]}}])
+        self.assertFalse(Ingredient.objects.filter(name="새 재료").exists())
+
+
+class IngredientPriceHistoryTests(TestCase):
+    def setUp(self):
+        user = CustomUser.objects.create_user(email="owner@livflow.co.kr", password="password")
+        self.store = Store.objects.create(user=user, name="본점")
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+        self.url = reverse("ingredient-unit-costs", args=[self.store.id])
+
+        self.milk = Ingredient.objects.create(store=self.store, name="우유", purchase_price=Decimal("3000"), purchase_quantity=Decimal("1000"), unit="ml", created_at=make_aware(datetime(2024, 12, 1)))
+        self.beans = Ingredient.objects.create(store=self.store, name="원두", purchase_price=Decimal("20000"), purchase_quantity=Decimal("1000"), unit="g", created_at=make_aware(datetime(2025, 1, 10)))
+        for day, price in ((1, "2000"), (20, "2500")):
+            self.milk.purchase_price = Decimal(price)
+            IngredientPriceHistory.record([self.milk], effective_at=make_aware(datetime(2025, 1, day, 9)))
+
+    def test_unit_costs_as_of_date_in_one_query(self):
+        with self.assertNumQueries(2):  # 상점 소유권 확인, 이력 서브쿼리 조회
+            response = self.client.get(self.url, {"date": "2025-01-20"})
+
+        milk, beans = response.json()["ingredients"]
+        self.assertEqual((milk["ingredient_cost"], milk["unit_cost"]), (2500.0, 2.5))
+        self.assertIsNotNone(milk["effective_at"])
+        self.assertEqual((beans["unit_cost"], beans["effective_at"]), (20.0, None))  # 이력 없음 → 현재 가격
+
+        milk, = self.client.get(self.url, {"date": "2025-01-19", "ingredient_id": str(self.milk.id)}).json()["ingredients"]
+        self.assertEqual(milk["unit_cost"], 2.0)
+
+    def test_price_update_appends_history(self):
+        url = reverse("ingredient-detail", args=[self.store.id, self.milk.id])
+        Inventory.objects.create(ingredient=self.milk, remaining_stock=1000)
+
+        self.client.put(url, {"ingredient_cost": "3300"}, format="json")
+        self.client.put(url, {"ingredient_detail": "메모만 수정"}, format="json")
+
+        prices = list(self.milk.price_history.order_by("effective_at").values_list("purchase_price", flat=True))
+        self.assertEqual(prices, [Decimal("2000"), Decimal("2500"), Decimal("3300")])
+        self.assertEqual(self.client.get(self.url).json()["ingredients"][0]["unit_cost"], 3.3)
+
+    def test_first_change_keeps_old_price_for_past_dates(self):
+        # 원두는 이력 없이 등록된 재료 → 가격을 바꾸면 바뀌기 전 가격이 등록 시각 기준으로 남아야 함
+        Inventory.objects.create(ingredient=self.beans, remaining_stock=1000)
+        url = reverse("ingredient-detail", args=[self.store.id, self.beans.id])
+
+        self.client.put(url, {"ingredient_cost": "30000"}, format="json")
+
+        past = self.client.get(self.url, {"date": "2025-02-01", "ingredient_id": str(self.beans.id)}).json()["ingredients"]
+        self.assertEqual(past[0]["unit_cost"], 20.0)
+        self.assertEqual(self.client.get(self.url, {"ingredient_id": str(self.beans.id)}).json()["ingredients"][0]["unit_cost"], 30.0)
+
+    def test_ingredients_created_after_date_are_excluded(self):
+        ingredients = self.client.get(self.url, {"date": "2025-01-05"}).json()["ingredients"]
+
+        self.assertEqual([(i["ingredient_name"], i["unit_cost"]) for i in ingredients], [("우유", 2.0)])
+
+    def test_invalid_date_is_bad_request(self):
+        self.assertEqual(self.client.get(self.url, {"date": "2025-13-01"}).status_code, 400)
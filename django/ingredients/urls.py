@@ -1,8 +1,11 @@
 from django.urls import path
-from .views import StoreIngredientView, IngredientDetailView, IngredientUsagesView
+from .views import StoreIngredientView, IngredientDetailView, IngredientUsagesView, IngredientUsagesBatchView, IngredientBulkUpsertView, IngredientUnitCostsAsOfView
 
 urlpatterns = [
     path('<uuid:store_id>/', StoreIngredientView.as_view(), name='store-ingredients'),  
+    path('<uuid:store_id>/bulk/', IngredientBulkUpsertView.as_view(), name='ingredient-bulk-upsert'),
+    path('<uuid:store_id>/unit-costs/', IngredientUnitCostsAsOfView.as_view(), name='ingredient-unit-costs'),
+    path('<uuid:store_id>/usages/', IngredientUsagesBatchView.as_view(), name='ingredient-usages-batch'),
     path('<uuid:store_id>/<uuid:ingredient_id>/', IngredientDetailView.as_view(), name='ingredient-detail'), 
     path('<uuid:store_id>/<uuid:ingredient_id>/usages/', IngredientUsagesView.as_view(), name='ingredient-usages'),
 ]
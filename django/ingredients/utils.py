@@ -1,4 +1,7 @@
 # ingredients/utils.py
+from django.db.models import OuterRef, Subquery
+from costcalcul.models import RecipeItem
+from .models import Ingredient, IngredientPriceHistory
 
 def calculate_unit_price(purchase_price, purchase_quantity):
     """
@@ -7,3 +10,65 @@ def calculate_unit_price(purchase_price, purchase_quantity):
     if purchase_quantity == 0:
         return 0  # 용량이 0인 경우를 대비해 0을 반환
     return round(purchase_price / purchase_quantity, 2)  # 소수점 둘째 자리까지 반올림
+
+
+def get_ingredient_usages(store_id, ingredient_ids):
+    """
+    재료별 사용 레시피 목록 (사용량, 원가 기여액, 레시피 재료비 중 비율 %).
+    원가와 비율은 RecipeItem.objects.with_costs()로 계산해(레시피 총액은 필터와 무관하게 레시피 전체 기준)
+    재료 개수와 상관없이 쿼리 1번으로 조회한다.
+    반환값: {ingredient_id: [{"recipe_id", "recipe_name", "quantity_used", "cost", "share"}, ...]}
+    """
+    rows = (
+        RecipeItem.objects.with_costs()
+        .filter(ingredient_id__in=ingredient_ids, recipe__store_id=store_id)
+        .order_by("recipe__name", "recipe_id")
+        .values_list("ingredient_id", "recipe_id", "recipe__name", "quantity_used", "db_material_cost", "db_material_ratio")
+    )
+
+    usages = {ingredient_id: [] for ingredient_id in ingredient_ids}
+    for ingredient_id, recipe_id, recipe_name, quantity_used, cost, share in rows:
+        usages.setdefault(ingredient_id, []).append({
+            "recipe_id": str(recipe_id),
+            "recipe_name": recipe_name,
+            "quantity_used": float(quantity_used),
+            "cost": round(float(cost or 0), 2),
+            "share": round(float(share or 0), 2),
+        })
+    return usages
+
+
+def get_unit_costs_as_of(store_id, as_of, ingredient_ids=None):
+    """
+    as_of 시점의 재료별 단가. 재료마다 as_of 이전 가장 최근 가격 이력을 서브쿼리로 붙여 쿼리 1번으로 조회한다.
+    이력이 없는 재료는 가격이 바뀐 적이 없으므로(바꿀 때 기존 가격을 먼저 기록함) 현재 가격을 쓰고 effective_at은 None으로 둔다.
+    """
+    latest = (
+        IngredientPriceHistory.objects.filter(ingredient_id=OuterRef("id"), effective_at__lte=as_of)
+        .order_by("-effective_at", "-id")
+    )
+    ingredients = Ingredient.objects.filter(store_id=store_id, created_at__lte=as_of)  # as_of 이후 등록된 재료 제외
+    if ingredient_ids is not None:
+        ingredients = ingredients.filter(id__in=ingredient_ids)
+
+    rows = ingredients.annotate(
+        history_price=Subquery(latest.values("purchase_price")[:1]),
+        history_quantity=Subquery(latest.values("purchase_quantity")[:1]),
+        history_at=Subquery(latest.values("effective_at")[:1]),
+    ).order_by("created_at").values_list(
+        "id", "name", "purchase_price", "purchase_quantity", "history_price", "history_quantity", "history_at",
+    )
+
+    unit_costs = []
+    for ingredient_id, name, price, quantity, history_price, history_quantity, history_at in rows:
+        if history_at is not None:
+            price, quantity = history_price, history_quantity
+        unit_costs.append({
+            "ingredient_id": str(ingredient_id),
+            "ingredient_name": name,
+            "ingredient_cost": float(price),
+            "capacity": float(quantity),
+            "unit_cost": float(calculate_unit_price(price, quantity)),
+            "effective_at": history_at,
+        })
+    return unit_costs
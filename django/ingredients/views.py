@@ -1,15 +1,28 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from django.shortcuts import get_object_or_404
 from django.db import transaction
-from .models import Ingredient
+from .models import Ingredient, IngredientPriceHistory, ingredient_unit_cost
 from inventory.models import Inventory
-from .serializers import IngredientSerializer
+from .serializers import IngredientSerializer, IngredientUpsertSerializer
+from .imports import MAX_UPSERT_ROWS, IngredientUpsertError, read_csv_rows, upsert_ingredients
 from store.models import Store
 from drf_yasg.utils import swagger_auto_schema
+from drf_yasg import openapi
+from django.db.models import F, TextField, Value
+from django.db.models.functions import NullIf, Round
 from decimal import Decimal
 from costcalcul.models import RecipeItem
+from costcalcul.utils import recalculate_recipe_costs
+from .utils import calculate_unit_price, get_ingredient_usages, get_unit_costs_as_of
+from datetime import datetime, time, timedelta
+from django.utils.dateparse import parse_date
+from django.utils.timezone import make_aware, now
+from uuid import UUID
+
+MAX_USAGE_BATCH = 200
 
 class StoreIngredientView(APIView):
     """
@@ -18,25 +31,35 @@ class StoreIngredientView(APIView):
 
     @swagger_auto_schema(
         operation_summary="특정 상점의 모든 재료 조회",
+        manual_parameters=[
+            openapi.Parameter("vendor", openapi.IN_QUERY, description="구매처로 필터", type=openapi.TYPE_STRING, required=False),
+            openapi.Parameter("name", openapi.IN_QUERY, description="재료명 검색 (부분 일치)", type=openapi.TYPE_STRING, required=False),
+        ],
         responses={200: "재료 목록 반환"}
     )
 
     def get(self, request, store_id):
-        """ 특정 상점의 모든 재료 조회 (Ingredient 기준) """
-        ingredients = Ingredient.objects.filter(store_id=store_id).order_by("created_at")
-        ingredient_data = [
-            {
-                "ingredient_id": str(ingredient.id),
-                "ingredient_name": ingredient.name,
-                "ingredient_cost": ingredient.purchase_price,
-                "capacity": ingredient.purchase_quantity,  # 원래 등록된 구매 용량 기준
-                "unit": ingredient.unit,
-                "unit_cost": ingredient.unit_cost,
-                "shop": ingredient.vendor if ingredient.vendor else None,
-                "ingredient_detail": ingredient.notes if ingredient.notes else None,
-            }
-            for ingredient in ingredients
-        ]
+        """ 특정 상점의 모든 재료 조회 (모델 객체 없이 values 조회, 단가는 SQL에서 계산해 소수점 둘째 자리까지 반올림) """
+        ingredients = Ingredient.objects.filter(store_id=store_id)
+
+        vendor = request.GET.get("vendor")
+        if vendor:
+            ingredients = ingredients.filter(vendor=vendor)
+        name = request.GET.get("name")
+        if name:
+            ingredients = ingredients.filter(name__icontains=name)
+
+        ingredient_data = ingredients.order_by("created_at").values(
+            "unit",
+            ingredient_id=F("id"),
+            ingredient_name=F("name"),
+            ingredient_cost=F("purchase_price"),
+            capacity=F("purchase_quantity"),  # 원래 등록된 구매 용량 기준
+            unit_cost=Round(ingredient_unit_cost(), 2),
+            shop=NullIf("vendor", Value("")),
+            ingredient_detail=NullIf("notes", Value(""), output_field=TextField()),
+        )
+        ingredient_data = [{**row, "ingredient_id": str(row["ingredient_id"])} for row in ingredient_data]
         return Response(ingredient_data, status=status.HTTP_200_OK)
 
     @swagger_auto_schema(
@@ -61,12 +84,69 @@ class StoreIngredientView(APIView):
                     ingredient=ingredient,
                     remaining_stock=ingredient.purchase_quantity,
                 )
+                IngredientPriceHistory.record([ingredient])
 
                 return Response(serializer.data, status=status.HTTP_201_CREATED)
             
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+class IngredientBulkUpsertView(APIView):
+    """
+    재료 일괄 등록/수정 API (JSON 배열 또는 CSV 업로드)
+    """
+    parser_classes = (JSONParser, MultiPartParser, FormParser)
+
+    @swagger_auto_schema(
+        operation_summary="재료 일괄 등록/수정",
+        operation_description=(
+            "JSON 배열([{ingredient_id?, ingredient_name, ingredient_cost, capacity, unit, shop?, ingredient_detail?}]) 또는 "
+            "CSV 파일(file, 헤더: ingredient_name,ingredient_cost,capacity,unit[,ingredient_id,shop,ingredient_detail])을 받아 "
+            "한 트랜잭션으로 저장합니다. ingredient_id가 없으면 같은 이름의 재료를 수정하고, 없으면 새로 만듭니다. "
+            "한 행이라도 잘못되면 아무것도 저장하지 않고 행별 오류를 반환합니다."
+        ),
+        responses={200: "생성/수정된 재료 수와 ID 목록", 400: "행별 유효성 검사 오류"}
+    )
+    def post(self, request, store_id):
+        store = get_object_or_404(Store, id=store_id, user=request.user)
+
+        uploaded_file = request.FILES.get("file")
+        if uploaded_file:
+            try:
+                rows = read_csv_rows(uploaded_file)
+            except ValueError as e:
+                return Response({"error": f"CSV 파일을 읽을 수 없습니다: {e}"}, status=status.HTTP_400_BAD_REQUEST)
+        else:
+            rows = request.data
+            if not isinstance(rows, list):
+                return Response({"error": "재료 배열 또는 CSV 파일(file)이 필요합니다."}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not rows:
+            return Response({"error": "등록할 재료가 없습니다."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(rows) > MAX_UPSERT_ROWS:
+            return Response({"error": f"한 번에 최대 {MAX_UPSERT_ROWS}개까지 등록할 수 있습니다."}, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = IngredientUpsertSerializer(data=rows, many=True)
+        if not serializer.is_valid():
+            errors = [
+                {"row": index, "errors": row_errors}
+                for index, row_errors in enumerate(serializer.errors)
+                if row_errors
+            ]
+            return Response({"errors": errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            created, updated, ingredients = upsert_ingredients(store, serializer.validated_data)
+        except IngredientUpsertError as e:
+            return Response({"errors": e.errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            "created": len(created),
+            "updated": len(updated),
+            "ingredient_ids": [str(ingredient.id) for ingredient in ingredients],
+        }, status=status.HTTP_200_OK)
+
+
 class IngredientDetailView(APIView):
     """
     특정 재료를 조회, 수정 및 삭제하는 API
@@ -87,7 +167,7 @@ class IngredientDetailView(APIView):
             "ingredient_cost": ingredient.purchase_price,
             "capacity": ingredient.purchase_quantity, # 구매용량
             "unit": ingredient.unit,
-            "unit_cost": ingredient.unit_cost,
+            "unit_cost": calculate_unit_price(ingredient.purchase_price, ingredient.purchase_quantity),
             "shop": ingredient.vendor if ingredient.vendor else None,
             "ingredient_detail": ingredient.notes if ingredient.notes else None,
         }
@@ -150,7 +230,17 @@ class IngredientDetailView(APIView):
                 inventory.save()
 
             #  `original_stock` 반영 후 재료 업데이트
-            serializer.save(purchase_quantity=new_original_stock)
+            old_price = (ingredient.purchase_price, ingredient.purchase_quantity)
+            new_price = (serializer.validated_data.get("purchase_price", ingredient.purchase_price), new_original_stock)
+            with transaction.atomic():
+                if new_price != old_price:
+                    IngredientPriceHistory.record_baselines([ingredient])  # 수정 전 가격 (이력이 없을 때만)
+                ingredient = serializer.save(purchase_quantity=new_original_stock)
+
+                # 가격/구매량이 바뀌면 이 재료를 쓰는 레시피들의 저장된 원가 재계산
+                if (ingredient.purchase_price, ingredient.purchase_quantity) != old_price:
+                    recalculate_recipe_costs(ingredient_ids=[ingredient.id])
+                    IngredientPriceHistory.record([ingredient])
             return Response(serializer.data, status=status.HTTP_200_OK)
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -164,7 +254,11 @@ class IngredientDetailView(APIView):
     def delete(self, request, store_id, ingredient_id):
         """ 특정 재료 삭제 """
         ingredient = get_object_or_404(Ingredient, id=ingredient_id, store_id=store_id)
-        ingredient.delete()
+        with transaction.atomic():
+            # 재료가 빠진 레시피들의 원가 재계산
+            recipe_ids = list(RecipeItem.objects.filter(ingredient=ingredient).values_list("recipe_id", flat=True).distinct())
+            ingredient.delete()
+            recalculate_recipe_costs(recipe_ids=recipe_ids)
         return Response({"message": "재료가 삭제되었습니다."}, status=status.HTTP_204_NO_CONTENT)
     
 class IngredientUsagesView(APIView):
@@ -172,12 +266,86 @@ class IngredientUsagesView(APIView):
     특정 재료를 사용하는 레시피(메뉴) 목록 조회 API
     """
 
+    @swagger_auto_schema(
+        operation_summary="특정 재료를 사용하는 레시피 목록 조회",
+        manual_parameters=[
+            openapi.Parameter("detail", openapi.IN_QUERY, description="true면 레시피별 사용량, 원가 기여액, 비율 포함", type=openapi.TYPE_BOOLEAN, required=False),
+        ],
+        responses={200: "레시피 이름 목록 (detail=true면 상세 목록)"}
+    )
     def get(self, request, store_id, ingredient_id):
         """특정 재료를 사용 중인 레시피 리스트 반환"""
-        # 해당 재료를 사용하는 RecipeItem 조회
-        recipe_items = RecipeItem.objects.filter(ingredient_id=ingredient_id, recipe__store_id=store_id)
+        if str(request.GET.get("detail", "")).lower() == "true":
+            usages = get_ingredient_usages(store_id, [ingredient_id])
+            return Response(usages[ingredient_id], status=status.HTTP_200_OK)
+
+        # 레시피 이름 목록 반환 (RecipeItem → Recipe 조인 1번)
+        recipe_names = list(
+            RecipeItem.objects.filter(ingredient_id=ingredient_id, recipe__store_id=store_id)
+            .values_list("recipe__name", flat=True)
+        )
 
-        # 레시피 이름 목록 반환
-        recipe_names = [item.recipe.name for item in recipe_items]
+        return Response(recipe_names, status=status.HTTP_200_OK)
 
-        return Response(recipe_names, status=status.HTTP_200_OK)
\ No newline at end of file
+
+class IngredientUsagesBatchView(APIView):
+    """
+    여러 재료의 사용 레시피 목록을 한 번에 조회하는 API
+    """
+
+    @swagger_auto_schema(
+        operation_summary="여러 재료의 사용 레시피 목록 일괄 조회",
+        manual_parameters=[
+            openapi.Parameter("ingredient_id", openapi.IN_QUERY, description="재료 ID (여러 번 지정)", type=openapi.TYPE_STRING, required=True),
+        ],
+        responses={200: "{재료 ID: 레시피별 사용량, 원가 기여액, 비율 목록}", 400: "재료 ID 오류"}
+    )
+    def get(self, request, store_id):
+        try:
+            ingredient_ids = [UUID(value) for value in request.GET.getlist("ingredient_id")]
+        except ValueError:
+            return Response({"error": "ingredient_id가 올바르지 않습니다."}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not ingredient_ids or len(ingredient_ids) > MAX_USAGE_BATCH:
+            return Response({"error": f"ingredient_id를 1~{MAX_USAGE_BATCH}개 지정해야 합니다."}, status=status.HTTP_400_BAD_REQUEST)
+
+        usages = get_ingredient_usages(store_id, ingredient_ids)
+        return Response({str(ingredient_id): rows for ingredient_id, rows in usages.items()}, status=status.HTTP_200_OK)
+
+
+class IngredientUnitCostsAsOfView(APIView):
+    """
+    특정 날짜 기준 재료 단가 조회 API (가격 이력 기준, 과거 월 원가 리포트용)
+    """
+
+    @swagger_auto_schema(
+        operation_summary="특정 날짜 기준 재료 단가 일괄 조회",
+        manual_parameters=[
+            openapi.Parameter("date", openapi.IN_QUERY, description="기준 날짜 (YYYY-MM-DD, 그날 마지막 가격). 없으면 현재", type=openapi.TYPE_STRING, required=False),
+            openapi.Parameter("ingredient_id", openapi.IN_QUERY, description="재료 ID (여러 번 지정, 없으면 상점 전체)", type=openapi.TYPE_STRING, required=False),
+        ],
+        responses={200: "재료별 단가 목록", 400: "날짜/재료 ID 오류", 404: "상점을 찾을 수 없음"}
+    )
+    def get(self, request, store_id):
+        store = get_object_or_404(Store, id=store_id, user=request.user)
+
+        as_of = now()
+        date_param = request.GET.get("date")
+        if date_param:
+            try:
+                day = parse_date(date_param)
+            except ValueError:
+                day = None
+            if day is None:
+                return Response({"error": "date는 YYYY-MM-DD 형식이어야 합니다."}, status=status.HTTP_400_BAD_REQUEST)
+            as_of = make_aware(datetime.combine(day + timedelta(days=1), time.min)) - timedelta(microseconds=1)
+
+        ingredient_ids = None
+        if "ingredient_id" in request.GET:
+            try:
+                ingredient_ids = [UUID(value) for value in request.GET.getlist("ingredient_id")]
+            except ValueError:
+                return Response({"error": "ingredient_id가 올바르지 않습니다."}, status=status.HTTP_400_BAD_REQUEST)
+
+        unit_costs = get_unit_costs_as_of(store.id, as_of, ingredient_ids)
+        return Response({"date": date_param, "ingredients": unit_costs}, status=status.HTTP_200_OK)
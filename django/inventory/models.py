@@ -4,7 +4,7 @@ from django.utils.timezone import now
 
 class Inventory(models.Model):
     ingredient = models.OneToOneField(Ingredient, on_delete=models.CASCADE, related_name="inventory")
-    remaining_stock = models.FloatField(default=0)  
+    remaining_stock = models.DecimalField(max_digits=10, decimal_places=2, default=0)  # ✅ 구매량(purchase_quantity)과 같은 Decimal
     created_at = models.DateTimeField(default=now, editable=False)
     updated_at = models.DateTimeField(auto_now=True)  
 
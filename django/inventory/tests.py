@@ -1,3 +1,55 @@
+from decimal import Decimal
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from users.models import CustomUser
+from store.models import Store
+from ingredients.models import Ingredient
+from inventory.models import Inventory
 
-# Create your tests here.
+
+class UseIngredientStockTests(TestCase):
+    def setUp(self):
+        user = CustomUser.objects.create_user(email="owner@livflow.co.kr", password="password")
+        self.store = Store.objects.create(user=user, name="본점")
+        self.milk = Ingredient.objects.create(store=self.store, name="우유", purchase_price=Decimal("3000"), purchase_quantity=Decimal("1000"), unit="ml")
+        self.inventory = Inventory.objects.create(ingredient=self.milk, remaining_stock=Decimal("300.50"))
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+        self.url = reverse("use-ingredient-stock", args=[self.store.id, self.milk.id])
+
+    def test_consumes_with_one_conditional_update(self):
+        with self.assertNumQueries(2):  # 조건부 UPDATE, 응답용 재고 조회
+            response = self.client.post(self.url, {"used_stock": 100.25}, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        self.inventory.refresh_from_db()
+        self.assertEqual(self.inventory.remaining_stock, Decimal("200.25"))
+
+    def test_stock_check_applies_to_the_updated_row(self):
+        # 재고 조건이 서브쿼리가 아니라 갱신 대상 행에 걸려야 동시 요청 시 DB가 다시 확인함
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(self.url, {"used_stock": 1}, format="json")
+
+        update_sql = next(q["sql"] for q in queries if q["sql"].startswith("UPDATE"))
+        self.assertIn('"inventory_inventory"."remaining_stock" >=', update_sql)
+        self.assertNotIn("JOIN", update_sql)
+
+    def test_cannot_consume_more_than_remaining(self):
+        self.assertEqual(self.client.post(self.url, {"used_stock": "300.50"}, format="json").status_code, 200)
+
+        response = self.client.post(self.url, {"used_stock": "0.01"}, format="json")
+
+        self.assertEqual(response.status_code, 400)
+        self.inventory.refresh_from_db()
+        self.assertEqual(self.inventory.remaining_stock, Decimal("0"))
+
+    def test_invalid_amount_and_unknown_ingredient(self):
+        for used_stock in ("abc", 0, -5, "NaN"):
+            self.assertEqual(self.client.post(self.url, {"used_stock": used_stock}, format="json").status_code, 400)
+
+        other = Ingredient.objects.create(store=self.store, name="원두", purchase_price=1, purchase_quantity=1, unit="g")
+        url = reverse("use-ingredient-stock", args=[self.store.id, other.id])
+        self.assertEqual(self.client.post(url, {"used_stock": 1}, format="json").status_code, 404)
@@ -10,7 +10,7 @@ from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 from django.db.models import F
 from django.utils.timezone import now
-from decimal import Decimal
+from decimal import Decimal, InvalidOperation
 
 # 특정 상점의 재고 조회
 class StoreInventoryView(APIView):
@@ -51,33 +51,34 @@ class UseIngredientStockView(APIView):
     )
     
     def post(self, request, store_id, ingredient_id):
-        """ 특정 재료의 재고 사용 처리 """
-        request_id = request.META.get('HTTP_X_REQUEST_ID', f"REQ-{now().strftime('%H%M%S%f')}")
-        used_stock = Decimal(str(request.data.get("used_stock", 0)))
-
-        with transaction.atomic():
-            inventory = get_object_or_404(Inventory, ingredient__id=ingredient_id, ingredient__store_id=store_id)
-            inventory.refresh_from_db()  # 최신 상태 반영
-
-            before_stock = Decimal(str(inventory.remaining_stock))  # 기존 재고 상태 저장
-            original_stock = Decimal(str(inventory.ingredient.purchase_quantity))
-
-            # **현재까지 사용한 총량 계산**
-            used_stock_so_far = original_stock - before_stock  # (원래 등록 용량 - 현재 남은 재고)
-
-            # **총 사용량이 original_stock을 넘지 않도록 확인**
-            total_usage = used_stock_so_far + used_stock  # 기존 사용량 + 새로 요청된 사용량
-
-            if total_usage > original_stock:
-                # print(f"[오류] REQUEST_ID: {request_id}, 총 사용량({total_usage})이 original_stock({original_stock})보다 큼")
-                return Response({"error": f"최대 사용 가능한 재고는 {original_stock - used_stock_so_far}입니다."}, status=status.HTTP_400_BAD_REQUEST)
+        """
+        특정 재료의 재고 사용 처리.
+        남은 재고가 충분할 때만 차감하는 조건부 UPDATE 한 번으로 처리해, 여러 POS에서 동시에 요청해도 재고가 음수가 되지 않는다.
+        (행 단위 잠금만 사용, 테이블 전체를 잠그지 않음)
+        """
+        try:
+            used_stock = Decimal(str(request.data.get("used_stock", 0)))
+        except InvalidOperation:
+            used_stock = None
+        if used_stock is None or not used_stock.is_finite() or used_stock <= 0:
+            return Response({"error": "used_stock은 0보다 큰 숫자여야 합니다."}, status=status.HTTP_400_BAD_REQUEST)
+
+        # 상점 조건은 조인 없이 재료 서브쿼리로 걸어, 재고 조건이 갱신 대상 행에 직접 적용되도록 한다
+        # (조인하면 UPDATE ... WHERE id IN (SELECT ...)로 바뀌어 재고 비교가 서브쿼리 안에서 일어남)
+        inventories = Inventory.objects.filter(
+            ingredient__in=Ingredient.objects.filter(id=ingredient_id, store_id=store_id).values("id")
+        )
 
-            # 재고 차감 로직
-            Inventory.objects.filter(id=inventory.id).update(remaining_stock=F('remaining_stock') - used_stock)
-            inventory.refresh_from_db()  # 최신 상태 반영
-            after_stock = inventory.remaining_stock
+        # 재고 차감 (UPDATE ... WHERE remaining_stock >= used_stock)
+        consumed = inventories.filter(remaining_stock__gte=used_stock).update(
+            remaining_stock=F("remaining_stock") - used_stock,
+            updated_at=now(),
+        )
 
-            # print(f" [재고 차감 완료] REQUEST_ID: {request_id}, 차감 전: {before_stock}, 차감할 수량: {used_stock}, 차감 후: {after_stock}")
+        # 응답용 최신 재고 (차감 실패 시 없는 재료인지, 재고 부족인지 구분)
+        inventory = get_object_or_404(inventories.select_related("ingredient"))
+        if not consumed:
+            return Response({"error": f"최대 사용 가능한 재고는 {inventory.remaining_stock}입니다."}, status=status.HTTP_400_BAD_REQUEST)
 
         return Response(
             {
@@ -1,5 +1,9 @@
 from django.contrib import admin
-from ledger.models import Category as LedgerCategory, Transaction  # ✅ 가계부 카테고리
+from django.db import transaction
+from ledger.models import Category as LedgerCategory, Transaction, DailySummary, LedgerBalance  # ✅ 가계부 카테고리
+from ledger.rollups import (
+    summary_key, record_transaction_created, record_transaction_updated, record_transaction_deleted
+)
 
 @admin.register(LedgerCategory)
 class LedgerCategoryAdmin(admin.ModelAdmin):
@@ -12,3 +16,35 @@ class TransactionAdmin(admin.ModelAdmin):
     search_fields = ('user__email', 'transaction_type', 'category__name', 'description')
     list_filter = ('transaction_type', 'date', 'category', 'store')
     raw_id_fields = ('user', 'category', 'store')
+
+    # ✅ 관리자 화면에서 수정해도 일별 집계(DailySummary) 반영
+    def save_model(self, request, obj, form, change):
+        with transaction.atomic():
+            if change:
+                old = Transaction.objects.get(pk=obj.pk)
+                super().save_model(request, obj, form, change)
+                record_transaction_updated(summary_key(old), old.amount, obj)
+            else:
+                super().save_model(request, obj, form, change)
+                record_transaction_created(obj)
+
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            super().delete_model(request, obj)
+            record_transaction_deleted(obj)
+
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            for obj in list(queryset):
+                self.delete_model(request, obj)
+
+@admin.register(DailySummary)
+class DailySummaryAdmin(admin.ModelAdmin):
+    list_display = ('store', 'date', 'transaction_type', 'category', 'total', 'count')
+    list_filter = ('transaction_type', 'store')
+    raw_id_fields = ('store', 'category')
+
+@admin.register(LedgerBalance)
+class LedgerBalanceAdmin(admin.ModelAdmin):
+    list_display = ('store', 'income_total', 'expense_total', 'balance', 'updated_at')
+    raw_id_fields = ('store',)
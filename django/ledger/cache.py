@@ -0,0 +1,224 @@
+import logging
+import threading
+from collections import OrderedDict
+from functools import partial
+from uuid import uuid4
+from django.core.cache import cache
+from django.db import transaction
+from ledger.models import Category
+
+logger = logging.getLogger(__name__)
+
+CATEGORY_CACHE_SIZE = 1024
+CATEGORY_GENERATION_KEY = "ledger:category_generation"
+
+
+class CategoryCache:
+    """
+    가계부 카테고리 이름 → ID 프로세스 로컬 LRU 캐시.
+    카테고리가 저장/삭제되면 공유 캐시(Redis)의 세대 값을 바꿔 모든 워커의 로컬 캐시를 무효화한다.
+    공유 캐시에 접근할 수 없으면 캐시를 쓰지 않고 DB에서 바로 조회한다.
+    """
+
+    def __init__(self, maxsize=CATEGORY_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._ids = OrderedDict()
+        self._generation = None
+        self._lock = threading.Lock()
+
+    def _shared_generation(self):
+        try:
+            generation = cache.get(CATEGORY_GENERATION_KEY)
+            if generation is None:
+                cache.add(CATEGORY_GENERATION_KEY, uuid4().hex, None)
+                generation = cache.get(CATEGORY_GENERATION_KEY)
+            return generation
+        except Exception as e:
+            logger.warning(f"카테고리 캐시 세대 조회 실패, DB 조회로 대체: {e}")
+            return None
+
+    def _sync(self):
+        """ 공유 세대 값이 바뀌었으면 로컬 캐시 비우기. 캐시 사용 가능 여부 반환 """
+        generation = self._shared_generation()
+        if generation is None:
+            return False
+        if generation != self._generation:
+            self._ids.clear()
+            self._generation = generation
+        return True
+
+    def get_ids(self, names):
+        """ 카테고리명 집합 → {이름: ID}. 캐시에 없는 이름만 한 번에 조회하고, 없으면 생성 """
+        names = set(names)
+        with self._lock:
+            usable = self._sync()
+            found = {}
+            if usable:
+                for name in names:
+                    if name in self._ids:
+                        self._ids.move_to_end(name)
+                        found[name] = self._ids[name]
+
+        missing = names - found.keys()
+        if missing:
+            loaded = dict(Category.objects.filter(name__in=missing).values_list("name", "id"))
+
+            not_created = missing - loaded.keys()
+            if not_created:
+                Category.objects.bulk_create([Category(name=name) for name in not_created], ignore_conflicts=True)
+                loaded.update(Category.objects.filter(name__in=not_created).values_list("name", "id"))
+
+            if usable:
+                # 커밋된 뒤에만 캐시 (트랜잭션이 롤백되면 없는 ID가 캐시에 남지 않도록)
+                transaction.on_commit(partial(self._remember, loaded))
+            found.update(loaded)
+
+        return found
+
+    def _remember(self, ids):
+        with self._lock:
+            if self._generation is None:
+                return
+            for name, category_id in ids.items():
+                self._ids[name] = category_id
+                self._ids.move_to_end(name)
+            while len(self._ids) > self.maxsize:
+                self._ids.popitem(last=False)
+
+    def invalidate(self):
+        """ 모든 워커의 로컬 캐시 무효화 (카테고리 저장/삭제 시) """
+        with self._lock:
+            self._ids.clear()
+            self._generation = None
+        try:
+            cache.set(CATEGORY_GENERATION_KEY, uuid4().hex, None)
+        except Exception as e:
+            logger.warning(f"카테고리 캐시 세대 갱신 실패: {e}")
+
+
+category_cache = CategoryCache()
+
+
+def get_category_ids(names):
+    """ 카테고리명 여러 개 → {이름: ID} (없는 카테고리는 생성) """
+    return category_cache.get_ids(names)
+
+
+def get_category(name):
+    """ 카테고리명 → Category (캐시 적중 시 DB 조회 없이 id/name만 채운 객체) """
+    return Category(id=get_category_ids([name])[name], name=name)
+
+
+# ✅ 상점별 월 요약(달력/차트) 캐시
+# (store, year, month)마다 버전 토큰을 두고, 거래가 바뀌면 커밋 후 해당 월의 토큰만 교체한다.
+# 데이터 키에 버전이 들어가므로 예전 버전의 값은 더 이상 읽히지 않고 만료된다.
+SUMMARY_CACHE_TIMEOUT = 60 * 60 * 24
+SUMMARY_HITS_KEY = "ledger:summary_cache:hits"
+SUMMARY_MISSES_KEY = "ledger:summary_cache:misses"
+
+
+def summary_version_key(store_id, year, month):
+    return f"ledger:summary_version:{store_id}:{year}:{month}"
+
+
+def get_summary_versions(months):
+    """ [(store_id, year, month)] → {(store_id, year, month): 버전 토큰} (없으면 새로 발급) """
+    keys = {month: summary_version_key(*month) for month in months}
+    versions = cache.get_many(keys.values())
+
+    for month, key in keys.items():
+        if key not in versions:
+            cache.add(key, uuid4().hex, None)
+            versions[key] = cache.get(key)
+
+    return {month: versions[key] for month, key in keys.items()}
+
+
+def bump_summary_versions(months):
+    """ 해당 (store_id, year, month)들의 캐시된 요약 무효화 """
+    try:
+        cache.set_many({summary_version_key(*month): uuid4().hex for month in set(months)}, None)
+    except Exception as e:
+        logger.warning(f"가계부 요약 캐시 무효화 실패: {e}")
+
+
+def invalidate_month_summaries(months):
+    """ 거래 변경이 커밋된 뒤 해당 월 요약 캐시 무효화 (커밋 전 값이 새 버전으로 캐시되지 않도록) """
+    months = {(store_id, year, month) for store_id, year, month in months}
+    if months:
+        transaction.on_commit(partial(bump_summary_versions, months))
+
+
+def count_summary_cache(hits=0, misses=0):
+    for key, amount in ((SUMMARY_HITS_KEY, hits), (SUMMARY_MISSES_KEY, misses)):
+        if not amount:
+            continue
+        try:
+            cache.incr(key, amount)
+        except ValueError:
+            if not cache.add(key, amount, None):
+                cache.incr(key, amount)
+
+
+def get_summary_cache_stats():
+    """ 월 요약 캐시 적중/미적중 횟수 """
+    counters = cache.get_many([SUMMARY_HITS_KEY, SUMMARY_MISSES_KEY])
+    hits = int(counters.get(SUMMARY_HITS_KEY, 0))
+    misses = int(counters.get(SUMMARY_MISSES_KEY, 0))
+    total = hits + misses
+    return {"hits": hits, "misses": misses, "hit_rate": round(hits / total, 4) if total else None}
+
+
+def get_cached_month_summary(store, year, month):
+    """ 캐시된 달력/차트 요약 반환 (없으면 계산 후 저장). 캐시 장애 시 바로 계산 """
+    from ledger.utils import get_month_summary
+
+    try:
+        version = get_summary_versions([(store.id, year, month)])[(store.id, year, month)]
+        key = f"ledger:month_summary:{store.id}:{year}:{month}:{version}"
+        summary = cache.get(key)
+    except Exception as e:
+        logger.warning(f"가계부 요약 캐시 조회 실패, DB 조회로 대체: {e}")
+        return get_month_summary(store, year, month)
+
+    if summary is not None:
+        count_summary_cache(hits=1)
+        return summary
+
+    summary = get_month_summary(store, year, month)
+    try:
+        cache.set(key, summary, SUMMARY_CACHE_TIMEOUT)
+        count_summary_cache(misses=1)
+    except Exception as e:
+        logger.warning(f"가계부 요약 캐시 저장 실패: {e}")
+    return summary
+
+
+def get_cached_monthly_charts(stores, year, month):
+    """ 여러 상점의 월 차트를 캐시에서 한 번에 읽고, 없는 상점만 모아서 한 번의 쿼리로 계산 """
+    from ledger.utils import get_monthly_charts
+
+    try:
+        versions = get_summary_versions([(store.id, year, month) for store in stores])
+        keys = {
+            store.id: f"ledger:month_chart:{store.id}:{year}:{month}:{versions[(store.id, year, month)]}"
+            for store in stores
+        }
+        cached = cache.get_many(keys.values())
+    except Exception as e:
+        logger.warning(f"가계부 차트 캐시 조회 실패, DB 조회로 대체: {e}")
+        return get_monthly_charts(stores, year, month)
+
+    charts = {store.id: cached[keys[store.id]] for store in stores if keys[store.id] in cached}
+    missing = [store for store in stores if store.id not in charts]
+    if missing:
+        computed = get_monthly_charts(missing, year, month)
+        charts.update(computed)
+
+    try:
+        if missing:
+            cache.set_many({keys[store_id]: chart for store_id, chart in computed.items()}, SUMMARY_CACHE_TIMEOUT)
+        count_summary_cache(hits=len(stores) - len(missing), misses=len(missing))
+    except Exception as e:
+        logger.warning(f"가계부 차트 캐시 저장 실패: {e}")
+    return charts
@@ -0,0 +1,129 @@
+import csv
+import zipfile
+from xml.sax.saxutils import escape
+from ledger.models import Transaction
+from ledger.utils import UNCATEGORIZED
+
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_COLUMNS = ("store", "date", "type", "category", "detail", "cost")
+
+
+def export_rows(stores, start=None, end=None):
+    """
+    내보낼 거래 행 (상점명, 날짜, 유형, 카테고리명, 내용, 금액) 튜플 제너레이터.
+    values_list + iterator로 모델 객체를 만들지 않고 청크 단위로 읽는다. (PostgreSQL에서는 서버 사이드 커서)
+    """
+    transactions = Transaction.objects.filter(store__in=stores)
+    if start:
+        transactions = transactions.filter(date__gte=start)
+    if end:
+        transactions = transactions.filter(date__lte=end)
+
+    rows = transactions.order_by("store__name", "store_id", "date", "created_at").values_list(
+        "store__name", "date", "transaction_type", "category__name", "description", "amount"
+    )
+    for store_name, day, trans_type, category_name, description, amount in rows.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield (store_name, day.isoformat(), trans_type, category_name or UNCATEGORIZED, description or "", amount)
+
+
+class _Buffer:
+    """ 쓰인 바이트/문자열을 모아 두었다가 꺼내 가는 스트리밍용 버퍼 """
+
+    def __init__(self, empty=""):
+        self.empty = empty
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = self.empty.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def stream_csv(rows):
+    """ CSV 스트리밍 (엑셀 한글 깨짐 방지 BOM 포함, 가져오기 CSV와 같은 컬럼명) """
+    buffer = _Buffer()
+    writer = csv.writer(buffer)
+
+    yield "\ufeff"
+    writer.writerow(EXPORT_COLUMNS)
+    for count, row in enumerate(rows, start=1):
+        writer.writerow(row)
+        if count % EXPORT_CHUNK_SIZE == 0:
+            yield buffer.drain()
+    yield buffer.drain()
+
+
+XLSX_STATIC_PARTS = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    "xl/workbook.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="ledger" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+
+
+def _xlsx_row(values):
+    """ 한 행 → <row> XML (숫자는 숫자 셀, 나머지는 인라인 문자열 셀) """
+    cells = []
+    for value in values:
+        if isinstance(value, str):
+            cells.append(f'<c t="inlineStr"><is><t xml:space="preserve">{escape(value)}</t></is></c>')
+        else:
+            cells.append(f"<c><v>{value}</v></c>")
+    return f"<row>{''.join(cells)}</row>"
+
+
+def stream_xlsx(rows):
+    """
+    XLSX 스트리밍. 시트 XML을 zip 항목에 조금씩 쓰고, 압축된 바이트를 바로 내보낸다.
+    (출력 스트림이 seek 불가능하면 zipfile이 데이터 디스크립터 방식으로 기록하므로 전체를 메모리에 두지 않음)
+    """
+    buffer = _Buffer(b"")
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as workbook:
+        for name, content in XLSX_STATIC_PARTS.items():
+            workbook.writestr(name, content)
+        yield buffer.drain()
+
+        with workbook.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as sheet:
+            sheet.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+            )
+            sheet.write(_xlsx_row(EXPORT_COLUMNS).encode())
+            for count, row in enumerate(rows, start=1):
+                sheet.write(_xlsx_row(row).encode())
+                if count % EXPORT_CHUNK_SIZE == 0:
+                    yield buffer.drain()
+            sheet.write(b"</sheetData></worksheet>")
+        yield buffer.drain()
+    yield buffer.drain()
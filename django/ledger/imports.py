@@ -0,0 +1,59 @@
+import csv
+import io
+from django.db import transaction
+from ledger.models import Transaction
+from ledger.cache import get_category_ids
+from ledger.rollups import apply_summary_deltas_in_bulk, summary_key
+
+MAX_IMPORT_ROWS = 5000
+IMPORT_BATCH_SIZE = 1000
+CSV_COLUMNS = ("date", "type", "category", "detail", "cost")
+
+
+def read_csv_rows(uploaded_file):
+    """ 업로드된 CSV(date,type,category,detail,cost 헤더) → dict 리스트 """
+    text = io.TextIOWrapper(uploaded_file.file, encoding="utf-8-sig")
+    try:
+        reader = csv.DictReader(text)
+        missing = [column for column in CSV_COLUMNS if column != "detail" and column not in (reader.fieldnames or [])]
+        if missing:
+            raise ValueError(f"CSV에 {', '.join(missing)} 컬럼이 필요합니다.")
+
+        return [
+            {key: value.strip() for key, value in row.items() if key and isinstance(value, str)}
+            for row in reader
+        ]
+    except (csv.Error, UnicodeDecodeError) as e:
+        raise ValueError(str(e))
+
+
+def import_transactions(user, store, rows):
+    """
+    검증된 행(TransactionImportSerializer.validated_data)들을 한 트랜잭션으로 일괄 저장.
+    카테고리는 이름→ID 캐시로 한 번에 해석하고, 일별 집계는 키별로 합산한 증감만 반영한다.
+    """
+    with transaction.atomic():
+        category_ids = get_category_ids(row["category"] for row in rows)
+
+        transactions = [
+            Transaction(
+                user=user,
+                store=store,
+                category_id=category_ids[row["category"]],
+                transaction_type=row["type"],
+                amount=row["cost"],
+                date=row["date"],
+                description=row.get("detail") or "",
+            )
+            for row in rows
+        ]
+        Transaction.objects.bulk_create(transactions, batch_size=IMPORT_BATCH_SIZE)
+
+        deltas = {}
+        for transaction_obj in transactions:
+            key = summary_key(transaction_obj)
+            amount, count = deltas.get(key, (0, 0))
+            deltas[key] = (amount + transaction_obj.amount, count + 1)
+        apply_summary_deltas_in_bulk(deltas)
+
+    return transactions
@@ -0,0 +1,30 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db.models import Exists, OuterRef
+from store.models import Store, Transaction as StoreTransaction
+from ledger.models import DailySummary, LedgerBalance, Transaction
+from ledger.rollups import rebuild_daily_summaries
+
+
+class Command(BaseCommand):
+    help = (
+        "배포 시 실행하는 가계부 백필: 남은 레거시 거래(store_transaction)를 옮기고(옮긴 상점은 집계 재생성), 거래는 있는데 일별 집계/잔액이 없는 상점만 집계를 생성합니다. "
+        "이미 처리된 상점은 건드리지 않으므로 매번 실행해도 안전합니다."
+    )
+
+    def handle(self, *args, **options):
+        if StoreTransaction.objects.exists():
+            call_command("copy_store_transactions", stdout=self.stdout)
+
+        store_ids = list(
+            Store.objects.filter(Exists(Transaction.objects.filter(store=OuterRef("pk"))))
+            .exclude(
+                Exists(DailySummary.objects.filter(store=OuterRef("pk")))
+                & Exists(LedgerBalance.objects.filter(store=OuterRef("pk")))
+            )
+            .values_list("id", flat=True)
+        )
+        if store_ids:
+            rebuild_daily_summaries(store_ids)
+
+        self.stdout.write(self.style.SUCCESS(f"집계가 없던 상점 {len(store_ids)}곳 백필 완료"))
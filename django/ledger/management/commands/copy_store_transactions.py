@@ -0,0 +1,78 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from store.models import Transaction as StoreTransaction
+from ledger.models import Transaction
+from ledger.rollups import rebuild_daily_summaries
+
+COPY_BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = (
+        "레거시 store_transaction 행을 ledger_transaction으로 옮깁니다 (일회성). "
+        "복사한 레거시 행은 같은 트랜잭션에서 삭제하므로, 다시 실행해도 사용자가 지운 거래가 되살아나지 않습니다."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="옮길 건수만 출력 (복사/삭제하지 않음)")
+
+    def handle(self, *args, **options):
+        dry_run = options["dry_run"]
+        copied, moved, store_ids = 0, 0, set()
+
+        with transaction.atomic():
+            last_id = None
+            while True:
+                # ID 순 키셋 페이지네이션 (처리한 행은 삭제되므로 오프셋을 쓰지 않음)
+                legacy = StoreTransaction.objects.order_by("id")
+                if last_id is not None:
+                    legacy = legacy.filter(id__gt=last_id)
+                batch = list(legacy[:COPY_BATCH_SIZE])
+                if not batch:
+                    break
+                last_id = batch[-1].id
+
+                copied += self.copy_batch(batch, store_ids, dry_run)
+                moved += len(batch)
+                if not dry_run:
+                    StoreTransaction.objects.filter(id__in=[row.id for row in batch]).delete()
+
+            if store_ids and not dry_run:
+                rebuild_daily_summaries(store_ids)
+
+        prefix = "[dry-run] " if dry_run else ""
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix}레거시 거래 {moved}건 처리, {copied}건 복사 (상점 {len(store_ids)}곳)"
+        ))
+
+    def copy_batch(self, rows, store_ids, dry_run):
+        """ ledger_transaction에 없는 행만 같은 ID/생성 시각으로 복사 """
+        existing = set(Transaction.objects.filter(id__in=[row.id for row in rows]).values_list("id", flat=True))
+        rows = [row for row in rows if row.id not in existing]
+        if not rows:
+            return 0
+
+        store_ids.update(row.store_id for row in rows)
+        if dry_run:
+            return len(rows)
+
+        copies = [
+            Transaction(
+                id=row.id,
+                user_id=row.user_id,
+                store_id=row.store_id,
+                amount=row.amount,
+                transaction_type=row.transaction_type,
+                category_id=row.category_id,
+                date=row.date,
+                description=row.description,
+            )
+            for row in rows
+        ]
+        Transaction.objects.bulk_create(copies, batch_size=COPY_BATCH_SIZE)
+
+        # auto_now_add로 덮어쓴 생성 시각을 원본 값으로 복원 (커서 페이지네이션 순서 유지)
+        for copy, row in zip(copies, rows):
+            copy.created_at = row.created_at
+        Transaction.objects.bulk_update(copies, ["created_at"], batch_size=COPY_BATCH_SIZE)
+        return len(copies)
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from ledger.rollups import rebuild_daily_summaries
+
+
+class Command(BaseCommand):
+    help = (
+        "가계부 거래 내역(ledger_transaction)으로부터 일별 집계(ledger_daily_summary)와 상점 잔액(ledger_balance)을 다시 생성합니다. "
+        "전체 재생성이므로 배포마다 실행하지 않고(배포 시에는 backfill_ledger), 집계가 어긋났을 때만 수동으로 실행합니다."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--store", action="append", dest="store_ids", help="특정 상점 ID만 재생성 (여러 번 지정 가능)")
+
+    def handle(self, *args, **options):
+        created = rebuild_daily_summaries(options["store_ids"])
+        self.stdout.write(self.style.SUCCESS(f"일별 집계 {created}건 생성 완료"))
@@ -14,9 +14,9 @@ class Category(models.Model):
 
     @classmethod
     def get_default_category(cls):
-        """ ✅ 기본 '미분류' 카테고리 가져오기 (없으면 생성) """
-        category, created = cls.objects.get_or_create(name="미분류")
-        return category.id
+        """ ✅ 기본 '미분류' 카테고리 가져오기 (없으면 생성, 이름→ID 캐시 사용) """
+        from ledger.cache import get_category_ids
+        return get_category_ids(["미분류"])["미분류"]
 
 
 # ✅ 2️⃣ 가계부 거래 내역 모델
@@ -48,7 +48,106 @@ class Transaction(models.Model):
 
     class Meta:
         db_table = "ledger_transaction"  # ✅ 테이블을 ledger_transaction으로 변경
+        indexes = [
+            # ✅ 상점 + 날짜 범위(+ 거래 유형) 조회용
+            models.Index(fields=["store", "date", "transaction_type"], name="ledger_tx_store_date_idx"),
+            # ✅ 상점별 생성순 목록 조회용
+            models.Index(fields=["store", "created_at"], name="ledger_tx_store_created_idx"),
+        ]
 
     def __str__(self):
         return f"{self.user.email}'s {self.transaction_type} on {self.date} for {self.amount}"
 
+    @classmethod
+    def get_totals(cls, user, store=None):
+        """
+        해당 사용자의 전체 수입과 지출을 집계 (상점별 누적 잔액 테이블 기준).
+        특정 가게(store)를 지정하면 해당 가게의 총합 반환.
+        """
+        filters = {"store__user": user}
+        if store:
+            filters["store"] = store
+
+        totals = LedgerBalance.objects.filter(**filters).aggregate(
+            income_total=models.Sum("income_total"), expense_total=models.Sum("expense_total")
+        )
+        income_total = totals["income_total"] or 0
+        expense_total = totals["expense_total"] or 0
+
+        return {
+            "income_total": income_total,
+            "expense_total": expense_total,
+            "balance": income_total - expense_total,
+        }
+
+    @classmethod
+    def get_current_month_totals(cls, user, store):
+        """
+        현재 월의 카테고리별 거래 합산 (일별 집계 테이블 기준)
+        """
+        from ledger.utils import month_range
+
+        today = now()
+        start, end = month_range(today.year, today.month)
+        rows = DailySummary.objects.filter(
+            store=store, store__user=user, date__gte=start, date__lt=end, count__gt=0
+        ).values("transaction_type", "category__name").annotate(total=models.Sum("total")).order_by()
+
+        return [
+            {"type": row["transaction_type"], "category": row["category__name"], "cost": row["total"]}
+            for row in rows
+        ]
+
+
+# ✅ 3️⃣ 가계부 일별 집계 (store, date, transaction_type, category → 합계, 건수)
+class DailySummary(models.Model):
+    store = models.ForeignKey(Store, on_delete=models.CASCADE, related_name="ledger_daily_summaries")
+    date = models.DateField()
+    transaction_type = models.CharField(max_length=7, choices=Transaction.TRANSACTION_TYPES)
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="daily_summaries"
+    )
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = "ledger_daily_summary"
+        indexes = [models.Index(fields=["store", "date"], name="ledger_daily_summary_date_idx")]
+        # category가 NULL(미분류)인 행은 일반 UNIQUE로 막히지 않으므로(NULL끼리는 서로 다른 값) 조건부 제약을 따로 둔다
+        constraints = [
+            models.UniqueConstraint(
+                fields=["store", "date", "transaction_type", "category"],
+                condition=models.Q(category__isnull=False),
+                name="ledger_daily_summary_unique_key",
+            ),
+            models.UniqueConstraint(
+                fields=["store", "date", "transaction_type"],
+                condition=models.Q(category__isnull=True),
+                name="ledger_daily_summary_unique_uncategorized",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.store_id} {self.date} {self.transaction_type} {self.category_id}: {self.total} ({self.count})"
+
+
+# ✅ 4️⃣ 상점별 누적 잔액 (거래 저장 시 일별 집계와 함께 갱신)
+class LedgerBalance(models.Model):
+    store = models.OneToOneField(Store, on_delete=models.CASCADE, primary_key=True, related_name="ledger_balance")
+    income_total = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    expense_total = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "ledger_balance"
+
+    @property
+    def balance(self):
+        return self.income_total - self.expense_total
+
+    def __str__(self):
+        return f"{self.store_id}: {self.balance}"
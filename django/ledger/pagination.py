@@ -0,0 +1,79 @@
+import base64
+import uuid
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.utils.encoders import JSONEncoder
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+STREAM_CHUNK_SIZE = 500
+
+
+def encode_cursor(transaction_obj):
+    """ (created_at, id) → URL에 넣을 수 있는 커서 문자열 """
+    raw = f"{transaction_obj.created_at.isoformat()}|{transaction_obj.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """ 커서 문자열 → (created_at, id). 형식이 잘못되면 ValueError """
+    try:
+        created_at, transaction_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        created_at = parse_datetime(created_at)
+        transaction_id = uuid.UUID(transaction_id)
+    except (TypeError, ValueError, UnicodeDecodeError):
+        raise ValueError("잘못된 cursor 값입니다.")
+
+    if created_at is None:
+        raise ValueError("잘못된 cursor 값입니다.")
+    return created_at, transaction_id
+
+
+def parse_page_size(limit):
+    """ limit 쿼리 파라미터 → 1 ~ MAX_PAGE_SIZE 범위의 페이지 크기 """
+    if limit in (None, ""):
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(int(limit), MAX_PAGE_SIZE))
+
+
+def paginate_by_keyset(queryset, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    (created_at, id) 키셋 페이지네이션.
+    OFFSET 없이 마지막 행 다음부터 page_size + 1개만 조회해 다음 페이지 존재 여부를 판단한다.
+    반환값: (현재 페이지 객체 리스트, 다음 커서 또는 None)
+    """
+    queryset = queryset.order_by("created_at", "id")
+    if cursor:
+        created_at, transaction_id = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=transaction_id)
+        )
+
+    rows = list(queryset[:page_size + 1])
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        return rows, encode_cursor(rows[-1])
+    return rows, None
+
+
+def stream_serialized(queryset, serializer_class, ndjson=False):
+    """
+    쿼리셋을 STREAM_CHUNK_SIZE 단위로 읽어가며 JSON 배열(또는 NDJSON)로 직렬화하는 제너레이터.
+    전체 목록을 메모리에 올리지 않는다. (PostgreSQL에서는 서버 사이드 커서 사용)
+    """
+    encoder = JSONEncoder(ensure_ascii=False)
+
+    if not ndjson:
+        yield "["
+
+    first = True
+    for obj in queryset.iterator(chunk_size=STREAM_CHUNK_SIZE):
+        data = encoder.encode(serializer_class(obj).data)
+        if ndjson:
+            yield data + "\n"
+        else:
+            yield data if first else "," + data
+        first = False
+
+    if not ndjson:
+        yield "]"
@@ -0,0 +1,204 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from ledger.models import DailySummary, LedgerBalance, Transaction
+from ledger.cache import invalidate_month_summaries
+
+REBUILD_BATCH_SIZE = 1000
+
+
+def summary_key(transaction_obj):
+    """ 거래가 속하는 일별 집계 행의 키 (store, date, transaction_type, category) """
+    return (
+        transaction_obj.store_id,
+        transaction_obj.date,
+        transaction_obj.transaction_type,
+        transaction_obj.category_id,
+    )
+
+
+def apply_summary_delta(key, amount, count):
+    """ 일별 집계 행 하나에 금액/건수 증감을 반영 (없으면 생성). 상점 잔액은 호출하는 쪽에서 반영 """
+    store_id, date, transaction_type, category_id = key
+    rows = DailySummary.objects.filter(
+        store_id=store_id, date=date, transaction_type=transaction_type, category_id=category_id
+    )
+
+    invalidate_month_summaries([(store_id, date.year, date.month)])
+
+    if rows.update(total=F("total") + amount, count=F("count") + count):
+        return
+
+    try:
+        with transaction.atomic():
+            DailySummary.objects.create(
+                store_id=store_id, date=date, transaction_type=transaction_type,
+                category_id=category_id, total=amount, count=count,
+            )
+    except IntegrityError:
+        # 동시에 같은 키의 행이 생성된 경우 → 생성된 행에 반영
+        rows.update(total=F("total") + amount, count=F("count") + count)
+
+
+def apply_summary_deltas(deltas):
+    """ {key: (amount, count)} 형태의 증감을 한 번에 반영 (변화 없는 키는 건너뜀) + 상점 잔액 반영 """
+    for key, (amount, count) in deltas.items():
+        if amount or count:
+            apply_summary_delta(key, amount, count)
+    apply_balance_deltas(balance_deltas(deltas))
+
+
+def balance_deltas(deltas):
+    """ 일별 집계 증감 → 상점별 {store_id: (수입 증감, 지출 증감)} """
+    by_store = {}
+    for (store_id, _, transaction_type, _), (amount, _) in deltas.items():
+        if not amount or transaction_type not in ("income", "expense"):
+            continue
+        income, expense = by_store.get(store_id, (0, 0))
+        if transaction_type == "income":
+            income += amount
+        else:
+            expense += amount
+        by_store[store_id] = (income, expense)
+    return by_store
+
+
+def apply_balance_deltas(by_store):
+    """ 상점별 누적 수입/지출 증감 반영 (잔액 행이 없으면 생성) """
+    for store_id, (income, expense) in by_store.items():
+        if not income and not expense:
+            continue
+        rows = LedgerBalance.objects.filter(store_id=store_id)
+        changes = {"income_total": F("income_total") + income, "expense_total": F("expense_total") + expense}
+        if rows.update(**changes):
+            continue
+
+        try:
+            with transaction.atomic():
+                LedgerBalance.objects.create(store_id=store_id, income_total=income, expense_total=expense)
+        except IntegrityError:
+            rows.update(**changes)
+
+
+def apply_summary_deltas_in_bulk(deltas):
+    """
+    대량 등록용: 여러 키의 증감을 쿼리 몇 번으로 반영 (transaction.atomic 안에서 호출).
+    기존 행은 잠근 뒤 bulk_update, 새 키는 bulk_create 한다.
+    그 사이 생긴 같은 키의 행은 유니크 제약(미분류 category=NULL용 조건부 제약 포함)으로 감지해 키별 반영으로 대체한다.
+    """
+    deltas = {key: value for key, value in deltas.items() if value[0] or value[1]}
+    if not deltas:
+        return
+
+    invalidate_month_summaries((key[0], key[1].year, key[1].month) for key in deltas)
+    apply_balance_deltas(balance_deltas(deltas))
+
+    existing = DailySummary.objects.select_for_update().filter(
+        store_id__in={key[0] for key in deltas},
+        date__in={key[1] for key in deltas},
+    )
+    rows_by_key = {
+        (row.store_id, row.date, row.transaction_type, row.category_id): row
+        for row in existing
+    }
+
+    updated_rows, new_rows = [], {}
+    for key, (amount, count) in deltas.items():
+        row = rows_by_key.get(key)
+        if row:
+            row.total += amount
+            row.count += count
+            updated_rows.append(row)
+        else:
+            store_id, date, transaction_type, category_id = key
+            new_rows[key] = DailySummary(
+                store_id=store_id, date=date, transaction_type=transaction_type,
+                category_id=category_id, total=amount, count=count,
+            )
+
+    if updated_rows:
+        DailySummary.objects.bulk_update(updated_rows, ["total", "count"], batch_size=REBUILD_BATCH_SIZE)
+
+    if new_rows:
+        try:
+            with transaction.atomic():
+                DailySummary.objects.bulk_create(new_rows.values(), batch_size=REBUILD_BATCH_SIZE)
+        except IntegrityError:
+            # 그 사이 다른 요청이 같은 키를 생성한 경우 → 키별 반영으로 대체 (잔액은 위에서 반영됨)
+            for key in new_rows:
+                apply_summary_delta(key, *deltas[key])
+
+
+def record_transaction_created(transaction_obj):
+    apply_summary_deltas({summary_key(transaction_obj): (transaction_obj.amount, 1)})
+
+
+def record_transaction_deleted(transaction_obj):
+    apply_summary_deltas({summary_key(transaction_obj): (-transaction_obj.amount, -1)})
+
+
+def record_transaction_updated(old_key, old_amount, transaction_obj):
+    """ 수정 전 키/금액과 수정 후 거래를 비교해 차이만 반영 """
+    new_key = summary_key(transaction_obj)
+    if old_key == new_key:
+        apply_summary_deltas({new_key: (transaction_obj.amount - old_amount, 0)})
+    else:
+        apply_summary_deltas({old_key: (-old_amount, -1), new_key: (transaction_obj.amount, 1)})
+
+
+def rebuild_daily_summaries(store_ids=None):
+    """ 거래 원본(ledger_transaction)으로부터 일별 집계와 상점 잔액을 다시 생성 """
+    transactions = Transaction.objects.all()
+    summaries = DailySummary.objects.all()
+    if store_ids is not None:
+        transactions = transactions.filter(store_id__in=store_ids)
+        summaries = summaries.filter(store_id__in=store_ids)
+
+    rows = (
+        transactions.values("store_id", "date", "transaction_type", "category_id")
+        .annotate(total=Sum("amount"), count=Count("id"))
+        .order_by()
+    )
+
+    created = 0
+    with transaction.atomic():
+        # 다시 만든 뒤 기존/새 집계가 있던 모든 (상점, 월)의 요약 캐시 무효화
+        months = set(summaries.values_list("store_id", "date__year", "date__month").distinct())
+        summaries.delete()
+
+        batch = []
+        for row in rows.iterator(chunk_size=REBUILD_BATCH_SIZE):
+            batch.append(DailySummary(**row))
+            months.add((row["store_id"], row["date"].year, row["date"].month))
+            if len(batch) >= REBUILD_BATCH_SIZE:
+                DailySummary.objects.bulk_create(batch)
+                created += len(batch)
+                batch = []
+
+        if batch:
+            DailySummary.objects.bulk_create(batch)
+            created += len(batch)
+
+        invalidate_month_summaries(months)
+        rebuild_balances(store_ids)
+
+    return created
+
+
+def rebuild_balances(store_ids=None):
+    """ 일별 집계로부터 상점별 누적 잔액 재계산 (rebuild_daily_summaries 안에서 호출) """
+    summaries = DailySummary.objects.filter(count__gt=0)
+    balances = LedgerBalance.objects.all()
+    if store_ids is not None:
+        summaries = summaries.filter(store_id__in=store_ids)
+        balances = balances.filter(store_id__in=store_ids)
+
+    totals = {}
+    for row in summaries.values("store_id", "transaction_type").annotate(total=Sum("total")).order_by():
+        balance = totals.setdefault(row["store_id"], LedgerBalance(store_id=row["store_id"]))
+        if row["transaction_type"] == "income":
+            balance.income_total = row["total"]
+        elif row["transaction_type"] == "expense":
+            balance.expense_total = row["total"]
+
+    balances.delete()
+    LedgerBalance.objects.bulk_create(totals.values(), batch_size=REBUILD_BATCH_SIZE)
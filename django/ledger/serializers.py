@@ -2,6 +2,7 @@ from rest_framework import serializers
 from django.shortcuts import get_object_or_404
 from store.models import Store
 from ledger.models import Transaction, Category
+from ledger.cache import get_category
 from datetime import datetime
 from rest_framework.exceptions import ValidationError
 
@@ -35,45 +36,37 @@ class TransactionSerializer(serializers.ModelSerializer):
         if isinstance(value, int) or str(value).isdigit():  
             return get_object_or_404(Category, id=int(value))  # ✅ ID로 변환
 
-        category, _ = Category.objects.get_or_create(name=value)  # ✅ 이름으로 변환
-        return category  
+        return get_category(value)  # ✅ 이름으로 변환 (이름→ID 캐시)
+
+    def validate(self, data):
+        """ ✅ 요청의 date({"year", "month", "day"})를 검증 단계에서 date로 변환 (생성 시 필수, 수정 시 보낸 경우만) """
+        if self.instance is None or "date" in self.initial_data:
+            date_data = self.initial_data.get("date", {})
+            try:
+                data["date"] = datetime(
+                    year=int(date_data["year"]), month=int(date_data["month"]), day=int(date_data["day"])
+                ).date()  # ✅ `datetime` → `date` 변환
+            except (KeyError, TypeError, ValueError):
+                raise ValidationError({"date": "year, month, day 값을 포함해야 합니다."})
+        return data
 
     def create(self, validated_data):
         store_id = validated_data.pop("store_id")
-        category_name = validated_data.pop("category")
-
-        store = get_object_or_404(Store, id=store_id)
-        category = self.validate_category(category_name)  # ✅ ForeignKey 변환
-
-        date_data = self.context["request"].data.get("date", {})
-        
-        # ✅ 날짜 디버깅 추가
-        print(f"📌 [DEBUG] 받은 date 데이터: {date_data}")
-        
-        try:
-            transaction_date = datetime(
-                year=date_data["year"], month=date_data["month"], day=date_data["day"]
-            ).date()  # ✅ `datetime` → `date` 변환
-        except KeyError:
-            raise ValidationError({"date": "year, month, day 값을 포함해야 합니다."})
-        
-        print(f"📌 [DEBUG] 변환된 transaction_date: {transaction_date}")
+        # ✅ 뷰에서 소유권 확인 후 넘겨준 store가 있으면 다시 조회하지 않음
+        store = validated_data.pop("store", None) or get_object_or_404(Store, id=store_id)
+        category = self.validate_category(validated_data.pop("category"))  # ✅ ForeignKey 변환
 
         # ✅ `request.user`를 사용해 현재 로그인한 사용자 자동 저장
-        transaction = Transaction.objects.create(
+        return Transaction.objects.create(
             user=self.context["request"].user,
             store=store,
             category=category,
             transaction_type=validated_data["transaction_type"],
             amount=validated_data["amount"],
-            date=transaction_date,
+            date=validated_data["date"],
             description=validated_data.get("description", ""),
         )
 
-        print(f"📌 [DEBUG] 저장된 Transaction ID: {transaction.id}, 날짜: {transaction.date}")
-
-        return transaction
-
     def update(self, instance, validated_data):
         if "category" in validated_data:
             category = self.validate_category(validated_data.pop("category"))
@@ -81,3 +74,26 @@ class TransactionSerializer(serializers.ModelSerializer):
 
         return super().update(instance, validated_data)
     
+
+class TransactionImportSerializer(serializers.Serializer):
+    """ 대량 등록(JSON 배열 / CSV)용 거래 내역 한 행 검증 (DB 조회 없음) """
+    type = serializers.ChoiceField(choices=Transaction.TRANSACTION_TYPES)
+    category = serializers.CharField(max_length=100, required=False, allow_blank=True, default="미분류")
+    detail = serializers.CharField(required=False, allow_blank=True, allow_null=True, default="")
+    cost = serializers.DecimalField(max_digits=10, decimal_places=2)
+    date = serializers.DateField()
+
+    def to_internal_value(self, data):
+        # ✅ 단건 생성 API와 같은 {"year", "month", "day"} 형식도 허용
+        date_data = data.get("date") if hasattr(data, "get") else None
+        if isinstance(date_data, dict):
+            try:
+                data = {**data, "date": datetime(
+                    year=int(date_data["year"]), month=int(date_data["month"]), day=int(date_data["day"])
+                ).date().isoformat()}
+            except (KeyError, TypeError, ValueError):
+                raise ValidationError({"date": "year, month, day 값을 포함해야 합니다."})
+        return super().to_internal_value(data)
+
+    def validate_category(self, value):
+        return value.strip() or "미분류"
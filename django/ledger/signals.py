@@ -0,0 +1,40 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from ledger.models import Category, DailySummary
+from ledger.rollups import rebuild_daily_summaries
+from ledger.cache import category_cache, invalidate_month_summaries
+
+
+@receiver(pre_delete, sender=Category)
+def remember_category_stores(sender, instance, **kwargs):
+    """ 카테고리 삭제 전, 해당 카테고리 집계가 있는 상점 목록 기억 """
+    instance._summary_store_ids = list(
+        DailySummary.objects.filter(category=instance).values_list("store_id", flat=True).distinct()
+    )
+
+
+@receiver(post_delete, sender=Category)
+def rebuild_category_stores(sender, instance, **kwargs):
+    """ 카테고리 삭제로 거래가 '미분류(NULL)'로 바뀐 상점의 일별 집계 재생성 """
+    store_ids = getattr(instance, "_summary_store_ids", None)
+    if store_ids:
+        rebuild_daily_summaries(store_ids)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_cache(sender, **kwargs):
+    """ 카테고리 추가/수정/삭제 시 이름→ID 캐시 무효화 """
+    category_cache.invalidate()
+
+
+@receiver(post_save, sender=Category)
+def invalidate_category_month_summaries(sender, instance, created, **kwargs):
+    """ 카테고리 이름이 바뀌면 해당 카테고리가 쓰인 월 요약 캐시 무효화 """
+    if created:
+        return
+    invalidate_month_summaries(
+        DailySummary.objects.filter(category=instance)
+        .values_list("store_id", "date__year", "date__month")
+        .distinct()
+    )
@@ -1,3 +1,644 @@
-from django.test import TestCase
+import base64
+import json
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import IntegrityError, transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from users.models import CustomUser
+from store.models import Store
+from ledger.models import Category, DailySummary, LedgerBalance, Transaction
+from ledger.cache import category_cache, get_summary_cache_stats
+from ledger.rollups import apply_summary_deltas_in_bulk, rebuild_daily_summaries
+from ledger.utils import get_month_summary, get_monthly_charts
 
-# Create your tests here.
+LOCMEM_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class LedgerTransactionCreateTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(email="owner@livflow.co.kr", password="password")
+        self.store = Store.objects.create(user=self.user, name="본점")
+        self.category = Category.objects.create(name="매출")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse("ledger-transaction-list-create", args=[self.store.id])
+
+    def payload(self, **overrides):
+        data = {
+            "type": "income",
+            "category": "매출",
+            "detail": "점심 매출",
+            "cost": 12000,
+            "date": {"year": 2025, "month": 3, "day": 14},
+        }
+        data.update(overrides)
+        return data
+
+    def test_create_updates_daily_summary(self):
+        response = self.client.post(self.url, self.payload(), format="json")
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["category"], "매출")
+        transaction_obj = Transaction.objects.get(id=response.json()["transaction_id"])
+        self.assertEqual(transaction_obj.date, date(2025, 3, 14))
+
+        summary = DailySummary.objects.get(store=self.store, date=date(2025, 3, 14), transaction_type="income")
+        self.assertEqual((summary.total, summary.count), (Decimal("12000.00"), 1))
+
+    def test_create_query_count(self):
+        # 같은 날짜/카테고리 집계 행이 이미 있고, 카테고리 캐시가 채워진 일반적인 경우
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(self.url, self.payload(), format="json")
+
+        # 상점 소유권 SELECT, SAVEPOINT, 거래 INSERT, 집계 UPDATE, 잔액 UPDATE, RELEASE SAVEPOINT
+        with self.assertNumQueries(6):
+            response = self.client.post(self.url, self.payload(cost=3000), format="json")
+
+        self.assertEqual(response.status_code, 201)
+
+    def test_create_rejects_other_users_store(self):
+        other = CustomUser.objects.create_user(email="other@livflow.co.kr", password="password")
+        other_store = Store.objects.create(user=other, name="남의 가게")
+        url = reverse("ledger-transaction-list-create", args=[other_store.id])
+
+        response = self.client.post(url, self.payload(), format="json")
+
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_save_failure_returns_error_response(self):
+        with mock.patch("ledger.views.record_transaction_created", side_effect=RuntimeError("집계 실패")), \
+                self.assertLogs("ledger.views", level="ERROR"):
+            response = self.client.post(self.url, self.payload(), format="json")
+
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(response.json(), {"error": "트랜잭션 저장 중 오류 발생"})
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_create_without_date_is_bad_request(self):
+        response = self.client.post(self.url, self.payload(date={}), format="json")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("date", response.json())
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class CategoryCacheTests(TestCase):
+    def setUp(self):
+        category_cache.invalidate()
+
+    def test_cached_lookup_runs_no_queries(self):
+        category = Category.objects.create(name="재료비")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(category_cache.get_ids(["재료비"]), {"재료비": category.id})
+
+        with self.assertNumQueries(0):
+            self.assertEqual(category_cache.get_ids(["재료비"]), {"재료비": category.id})
+
+    def test_rolled_back_category_is_not_cached(self):
+        ids = category_cache.get_ids(["롤백"])  # 커밋 전 (TestCase 트랜잭션 안)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(category_cache.get_ids(["롤백"]), ids)
+
+    def test_missing_category_is_created(self):
+        ids = category_cache.get_ids(["새 카테고리"])
+
+        self.assertEqual(Category.objects.get(name="새 카테고리").id, ids["새 카테고리"])
+
+    def test_rename_invalidates_cache(self):
+        category = Category.objects.create(name="임대료")
+        with self.captureOnCommitCallbacks(execute=True):
+            category_cache.get_ids(["임대료"])
+
+        category.name = "월세"
+        category.save()
+
+        ids = category_cache.get_ids(["임대료"])
+        self.assertNotEqual(ids["임대료"], category.id)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class LedgerSummaryCacheTests(TestCase):
+    def setUp(self):
+        category_cache.invalidate()
+        self.user = CustomUser.objects.create_user(email="owner@livflow.co.kr", password="password")
+        self.store = Store.objects.create(user=self.user, name="본점")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.calendar_url = reverse("ledger-calendar", args=[self.store.id])
+        self.create_url = reverse("ledger-transaction-list-create", args=[self.store.id])
+
+    def create_transaction(self, cost, day=14):
+        payload = {
+            "type": "income", "category": "매출", "detail": "", "cost": cost,
+            "date": {"year": 2025, "month": 3, "day": day},
+        }
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(self.create_url, payload, format="json")
+
+    def get_calendar(self, month=3):
+        return self.client.get(self.calendar_url, {"year": 2025, "month": month}).json()
+
+    def test_month_summary_is_served_from_cache(self):
+        self.create_transaction(12000)
+        first = self.get_calendar()
+        stats = get_summary_cache_stats()
+
+        # 상점 소유권 확인만 실행
+        with self.assertNumQueries(1):
+            self.assertEqual(self.get_calendar(), first)
+
+        self.assertEqual(get_summary_cache_stats()["hits"], stats["hits"] + 1)
+
+    def test_write_invalidates_only_that_month(self):
+        self.create_transaction(12000)
+        self.assertEqual(self.get_calendar()["chart"]["totalIncome"], 12000.0)
+        self.get_calendar(month=4)
+
+        self.create_transaction(3000, day=20)
+
+        self.assertEqual(self.get_calendar()["chart"]["totalIncome"], 15000.0)
+        hits = get_summary_cache_stats()["hits"]
+        self.get_calendar(month=4)
+        self.assertEqual(get_summary_cache_stats()["hits"], hits + 1)
+
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class LedgerMonthSummaryTests(TestCase):
+    def setUp(self):
+        category_cache.invalidate()
+        self.user = CustomUser.objects.create_user(email="owner@livflow.co.kr", password="password")
+        self.store = Store.objects.create(user=self.user, name="본점")
+        self.other_store = Store.objects.create(user=self.user, name="2호점")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        sales, rent, goods = (Category.objects.create(name=name) for name in ("매출", "임대료", "재료비"))
+
+        rows = (
+            (self.store, "income", sales, 10000, date(2025, 3, 1)),
+            (self.store, "income", sales, 5000, date(2025, 3, 1)),
+            (self.store, "expense", goods, 2000, date(2025, 3, 1)),
+            (self.store, "expense", rent, 7000, date(2025, 3, 15)),
+            (self.store, "expense", goods, 4000, date(2025, 3, 31)),
+            (self.store, "income", None, 1000, date(2025, 3, 31)),
+            (self.store, "income", sales, 99000, date(2025, 4, 1)),  # 다음 달 (포함되면 안 됨)
+            (self.store, "expense", rent, 50000, date(2025, 2, 28)),  # 이전 달
+            (self.other_store, "expense", goods, 800, date(2025, 3, 10)),
+        )
+        for store, trans_type, category, amount, day in rows:
+            Transaction.objects.create(
+                user=self.user, store=store, transaction_type=trans_type, category=category, amount=amount, date=day,
+            )
+        rebuild_daily_summaries([self.store.id, self.other_store.id])
+
+    def test_month_summary_days_totals_and_ranking(self):
+        summary = get_month_summary(self.store, 2025, 3)
+
+        self.assertEqual(summary["days"], [
+            {"day": 1, "hasIncome": True, "hasExpense": True},
+            {"day": 15, "hasIncome": False, "hasExpense": True},
+            {"day": 31, "hasIncome": True, "hasExpense": True},
+        ])
+        self.assertEqual(summary["chart"]["totalIncome"], Decimal("16000"))
+        self.assertEqual(summary["chart"]["totalExpense"], Decimal("13000"))
+        self.assertEqual(summary["chart"]["categories"], [
+            {"type": "income", "category": "매출", "cost": 15000.0},
+            {"type": "income", "category": "미분류", "cost": 1000.0},
+            {"type": "expense", "category": "임대료", "cost": 7000.0},
+            {"type": "expense", "category": "재료비", "cost": 6000.0},
+        ])
+        self.assertEqual(len(get_month_summary(self.store, 2025, 3, top_n=1)["chart"]["categories"]), 2)
+
+    def test_monthly_charts_per_store(self):
+        empty = Store.objects.create(user=self.user, name="3호점")
+
+        with self.assertNumQueries(1):
+            charts = get_monthly_charts([self.store, self.other_store, empty], 2025, 3)
+
+        self.assertEqual(charts[self.store.id][2], {"type": "expense", "category": "임대료", "cost": 7000.0})
+        self.assertEqual(charts[self.other_store.id], [{"type": "expense", "category": "재료비", "cost": 800.0}])
+        self.assertEqual(charts[empty.id], [])
+
+    def test_calendar_view_query_count(self):
+        url = reverse("ledger-calendar", args=[self.store.id])
+
+        with self.assertNumQueries(2):  # 상점 소유권 확인, 월 집계 조회 (캐시 미스)
+            response = self.client.get(url, {"year": 2025, "month": 3})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["chart"]["totalExpense"], 13000.0)
+        self.assertEqual([day["day"] for day in response.json()["days"]], [1, 15, 31])
+
+class LedgerReportTests(TestCase):
+    def setUp(self):
+        category_cache.invalidate()
+        self.user = CustomUser.objects.create_user(email="owner@livflow.co.kr", password="password")
+        self.store = Store.objects.create(user=self.user, name="본점")
+        self.category = Category.objects.create(name="매출")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse("ledger-report", args=[self.store.id])
+
+        for day, amount in ((date(2024, 2, 10), 500), (date(2025, 1, 15), 1000), (date(2025, 1, 20), 2000), (date(2025, 2, 3), 4000)):
+            Transaction.objects.create(
+                user=self.user, store=self.store, category=self.category,
+                transaction_type="income", amount=Decimal(amount), date=day,
+            )
+        rebuild_daily_summaries()
+
+    def test_monthly_buckets_with_previous_year(self):
+        with self.assertNumQueries(2):  # 상점 소유권 확인, 리포트 그룹 쿼리
+            response = self.client.get(self.url, {"start": "2025-01-01", "end": "2025-02-28", "compare": "previous_year"})
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([(b["period"], b["income"]) for b in data["buckets"]], [("2025-01-01", 3000.0), ("2025-02-01", 4000.0)])
+        self.assertEqual(data["buckets"][0]["categories"], [{"type": "income", "category": "매출", "cost": 3000.0}])
+        self.assertEqual([(b["period"], b["income"]) for b in data["previous"]], [("2024-02-01", 500.0)])
+
+    def test_week_bucket_starts_on_monday(self):
+        response = self.client.get(self.url, {"start": "2025-01-15", "end": "2025-01-31", "bucket": "week"})
+
+        self.assertEqual([b["period"] for b in response.json()["buckets"]], ["2025-01-13", "2025-01-20"])
+
+    def test_invalid_range_is_bad_request(self):
+        for params in ({"start": "2025-02-01", "end": "2025-01-01"}, {"start": "2025-01-01", "end": "2025-01-01", "bucket": "year"}, {"start": "x", "end": "2025-01-01"}):
+            self.assertEqual(self.client.get(self.url, params).status_code, 400)
+
+
+class LedgerExportTests(TestCase):
+    def setUp(self):
+        category_cache.invalidate()
+        self.user = CustomUser.objects.create_user(email="owner@livflow.co.kr", password="password")
+        self.stores = [Store.objects.create(user=self.user, name=name) for name in ("본점", "지점")]
+        category = Category.objects.create(name="매출")
+        for store in self.stores:
+            Transaction.objects.create(
+                user=self.user, store=store, category=category,
+                transaction_type="income", amount=Decimal("1500"), date=date(2025, 3, 14), description="점심, 매출",
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse("ledger-export")
+
+    def test_csv_export_covers_all_stores(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        content = b"".join(response.streaming_content).decode("utf-8-sig").splitlines()
+        self.assertEqual(content[0], "store,date,type,category,detail,cost")
+        self.assertEqual(content[1:], [
+            '본점,2025-03-14,income,매출,"점심, 매출",1500.00',
+            '지점,2025-03-14,income,매출,"점심, 매출",1500.00',
+        ])
+
+    def test_xlsx_export_is_valid_zip(self):
+        import io
+        import zipfile
+
+        response = self.client.get(self.url, {"file_format": "xlsx", "store": str(self.stores[0].id)})
+
+        workbook = zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content)))
+        self.assertIsNone(workbook.testzip())
+        sheet = workbook.read("xl/worksheets/sheet1.xml").decode()
+        self.assertEqual(sheet.count("<row>"), 2)
+        self.assertIn("점심, 매출", sheet)
+
+    def test_other_users_store_is_not_found(self):
+        other = CustomUser.objects.create_user(email="other@livflow.co.kr", password="password")
+        other_store = Store.objects.create(user=other, name="남의 가게")
+
+        response = self.client.get(self.url, {"store": str(other_store.id)})
+
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class LedgerBalanceTests(TestCase):
+    def setUp(self):
+        category_cache.invalidate()
+        self.user = CustomUser.objects.create_user(email="owner@livflow.co.kr", password="password")
+        self.store = Store.objects.create(user=self.user, name="본점")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse("ledger-balance", args=[self.store.id])
+        create_url = reverse("ledger-transaction-list-create", args=[self.store.id])
+        for trans_type, cost, day in (("income", 10000, 1), ("expense", 3000, 2), ("income", 5000, 10)):
+            self.client.post(create_url, {
+                "type": trans_type, "category": "매출", "detail": "", "cost": cost,
+                "date": {"year": 2025, "month": 3, "day": day},
+            }, format="json")
+
+    def test_balance_is_kept_on_write(self):
+        with self.assertNumQueries(2):  # 상점 소유권 확인, 잔액 행 조회
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.json(), {"date": None, "income_total": 15000.0, "expense_total": 3000.0, "balance": 12000.0})
+
+    def test_balance_at_date_sums_the_shorter_side(self):
+        # 집계 기간 3/1 ~ 3/10: 3/5는 앞쪽(3/5까지 합산), 3/9는 뒤쪽(잔액 행 - 3/10 이후)
+        with self.assertNumQueries(3):  # 상점 소유권 확인, 집계 기간, 3/5까지의 합계
+            early = self.client.get(self.url, {"date": "2025-03-05"}).json()
+        with self.assertNumQueries(4):  # 상점 소유권 확인, 집계 기간, 잔액 행, 3/9 이후의 합계
+            late = self.client.get(self.url, {"date": "2025-03-09"}).json()
+
+        self.assertEqual((early["income_total"], early["expense_total"], early["balance"]), (10000.0, 3000.0, 7000.0))
+        self.assertEqual((late["income_total"], late["expense_total"], late["balance"]), (10000.0, 3000.0, 7000.0))
+
+    def test_balance_outside_summary_range(self):
+        self.assertEqual(self.client.get(self.url, {"date": "2025-02-28"}).json()["balance"], 0.0)
+        self.assertEqual(self.client.get(self.url, {"date": "2025-03-10"}).json()["balance"], 12000.0)
+        self.assertEqual(self.client.get(self.url, {"date": "2026-01-01"}).json()["balance"], 12000.0)
+
+    def test_rebuild_matches_incremental_balance(self):
+        before = Transaction.get_totals(self.user, self.store)
+        rebuild_daily_summaries([self.store.id])
+
+        self.assertEqual(Transaction.get_totals(self.user, self.store), before)
+        self.assertEqual(before["balance"], Decimal("12000.00"))
+
+
+class DailySummaryUncategorizedTests(TestCase):
+    def setUp(self):
+        user = CustomUser.objects.create_user(email="owner@livflow.co.kr", password="password")
+        self.store = Store.objects.create(user=user, name="본점")
+
+    def test_uncategorized_key_is_unique(self):
+        DailySummary.objects.create(store=self.store, date=date(2025, 3, 14), transaction_type="income", category=None, total=1000, count=1)
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            DailySummary.objects.create(store=self.store, date=date(2025, 3, 14), transaction_type="income", category=None, total=500, count=1)
+
+    def test_bulk_delta_merges_into_existing_uncategorized_row(self):
+        key = (self.store.id, date(2025, 3, 14), "income", None)
+        DailySummary.objects.create(store=self.store, date=key[1], transaction_type="income", category=None, total=1000, count=1)
+
+        apply_summary_deltas_in_bulk({key: (Decimal("500"), 1)})
+
+        row, = DailySummary.objects.filter(store=self.store, category__isnull=True)
+        self.assertEqual((row.total, row.count), (Decimal("1500.00"), 2))
+
+    def test_bulk_create_race_on_uncategorized_key_falls_back(self):
+        # 잠금 조회 뒤 다른 요청이 같은 미분류 행을 만든 경우 → bulk_create 충돌 후 키별 반영
+        key = (self.store.id, date(2025, 3, 14), "income", None)
+        DailySummary.objects.create(store=self.store, date=key[1], transaction_type="income", category=None, total=1000, count=1)
+
+        with mock.patch.object(DailySummary.objects, "select_for_update", return_value=DailySummary.objects.none()), \
+                transaction.atomic():
+            apply_summary_deltas_in_bulk({key: (Decimal("500"), 1)})
+
+        row, = DailySummary.objects.filter(store=self.store, category__isnull=True)
+        self.assertEqual((row.total, row.count), (Decimal("1500.00"), 2))
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class LedgerTransactionUpdateDeleteTests(TestCase):
+    def setUp(self):
+        category_cache.invalidate()
+        self.user = CustomUser.objects.create_user(email="owner@livflow.co.kr", password="password")
+        self.store = Store.objects.create(user=self.user, name="본점")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        response = self.client.post(reverse("ledger-transaction-list-create", args=[self.store.id]), {
+            "type": "income", "category": "매출", "detail": "", "cost": 10000,
+            "date": {"year": 2025, "month": 3, "day": 14},
+        }, format="json")
+        self.url = reverse("ledger-transaction-detail", args=[self.store.id, response.json()["transaction_id"]])
+
+    def rollups(self):
+        summaries = sorted(
+            DailySummary.objects.filter(count__gt=0)
+            .values_list("store_id", "date", "transaction_type", "category_id", "total", "count")
+        )
+        balances = sorted(
+            LedgerBalance.objects.exclude(income_total=0, expense_total=0)
+            .values_list("store_id", "income_total", "expense_total")
+        )
+        return summaries, balances
+
+    def assertRollupsMatchRebuild(self):
+        incremental = self.rollups()
+        rebuild_daily_summaries()
+        self.assertEqual(incremental, self.rollups())
+        return incremental
+
+    def test_updates_keep_rollups_in_sync(self):
+        for change in (
+            {"cost": 15000},
+            {"category": "배달 매출"},
+            {"date": {"year": 2025, "month": 4, "day": 2}},
+            {"type": "expense"},
+        ):
+            response = self.client.put(self.url, change, format="json")
+            self.assertEqual(response.status_code, 200)
+            self.assertRollupsMatchRebuild()
+
+        summaries, balances = self.rollups()
+        self.assertEqual([(s[1], s[2], s[4]) for s in summaries], [(date(2025, 4, 2), "expense", Decimal("15000.00"))])
+        self.assertEqual(balances, [(self.store.id, Decimal("0.00"), Decimal("15000.00"))])
+
+    def test_delete_removes_from_rollups_once(self):
+        self.assertEqual(self.client.delete(self.url).status_code, 204)
+        self.assertEqual(self.client.delete(self.url).status_code, 404)
+
+        summaries, balances = self.assertRollupsMatchRebuild()
+        self.assertEqual((summaries, balances), ([], []))
+
+    def test_invalid_update_changes_nothing(self):
+        before = self.rollups()
+
+        response = self.client.put(self.url, {"cost": "x"}, format="json")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.rollups(), before)
+
+
+class LedgerBackfillTests(TestCase):
+    def setUp(self):
+        category_cache.invalidate()
+        self.user = CustomUser.objects.create_user(email="owner@livflow.co.kr", password="password")
+        self.category = Category.objects.create(name="매출")
+        self.stores = [Store.objects.create(user=self.user, name=name) for name in ("본점", "지점")]
+        for store in self.stores:
+            Transaction.objects.create(
+                user=self.user, store=store, category=self.category,
+                transaction_type="income", amount=Decimal("1000"), date=date(2025, 3, 14),
+            )
+
+    def test_backfills_only_stores_without_rollups(self):
+        rebuild_daily_summaries([self.stores[1].id])
+        DailySummary.objects.filter(store=self.stores[1]).update(total=Decimal("7"))  # 이미 집계된 상점은 그대로 둠
+
+        call_command("backfill_ledger", stdout=StringIO())
+
+        self.assertEqual(LedgerBalance.objects.get(store=self.stores[0]).balance, Decimal("1000.00"))
+        self.assertEqual(DailySummary.objects.get(store=self.stores[1]).total, Decimal("7.00"))
+
+    def test_rerun_is_a_no_op(self):
+        call_command("backfill_ledger", stdout=StringIO())
+
+        with self.assertNumQueries(2):  # 레거시 거래 존재 확인, 집계 없는 상점 조회
+            call_command("backfill_ledger", stdout=StringIO())
+
+
+class LedgerTransactionPaginationTests(TestCase):
+    def setUp(self):
+        category_cache.invalidate()
+        self.user = CustomUser.objects.create_user(email="owner@livflow.co.kr", password="password")
+        self.store = Store.objects.create(user=self.user, name="본점")
+        category = Category.objects.create(name="매출")
+        Transaction.objects.bulk_create([
+            Transaction(
+                user=self.user, store=self.store, category=category,
+                transaction_type="income", amount=Decimal(100 + i), date=date(2025, 3, 1 + i % 28),
+            )
+            for i in range(7)
+        ])
+        # 생성 시각이 같은 행이 페이지 경계에 걸치도록 두 그룹으로 맞춤
+        ids = list(Transaction.objects.order_by("id").values_list("id", flat=True))
+        Transaction.objects.filter(id__in=ids[:4]).update(created_at=datetime(2025, 3, 1, 9, tzinfo=timezone.utc))
+        Transaction.objects.filter(id__in=ids[4:]).update(created_at=datetime(2025, 3, 1, 10, tzinfo=timezone.utc))
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse("ledger-transaction-list-create", args=[self.store.id])
+
+    def get(self, **params):
+        return self.client.get(self.url, {"year": 2025, "month": 3, **params})
+
+    def test_cursor_walk_has_no_duplicates_or_gaps(self):
+        seen, cursor, pages = [], None, 0
+        while True:
+            params = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+            data = self.get(**params).json()
+            seen += [row["transaction_id"] for row in data["results"]]
+            pages += 1
+            cursor = data["next_cursor"]
+            if cursor is None:
+                break
+
+        expected = [str(i) for i in Transaction.objects.order_by("created_at", "id").values_list("id", flat=True)]
+        self.assertEqual(seen, expected)
+        self.assertEqual(pages, 3)
+
+    def test_last_page_has_null_cursor(self):
+        data = self.get(limit=7).json()
+
+        self.assertEqual(len(data["results"]), 7)
+        self.assertIsNone(data["next_cursor"])
+
+    def test_malformed_or_tampered_cursor_is_bad_request(self):
+        tampered = base64.urlsafe_b64encode(b"2025-03-01T09:00:00+00:00|not-a-uuid").decode()
+        for cursor in ("!!!", "bm90LWEtY3Vyc29y", tampered):
+            self.assertEqual(self.get(cursor=cursor).status_code, 400)
+        self.assertEqual(self.get(limit="abc").status_code, 400)
+
+    def test_page_size_is_clamped(self):
+        self.assertEqual(len(self.get(limit=0).json()["results"]), 1)
+        self.assertEqual(len(self.get(limit=-5).json()["results"]), 1)
+        with mock.patch("ledger.pagination.MAX_PAGE_SIZE", 2):
+            self.assertEqual(len(self.get(limit=100).json()["results"]), 2)
+
+    def test_streaming_json_and_ndjson(self):
+        expected = self.get().json()
+
+        response = self.get(stream="json")
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertEqual(json.loads(b"".join(response.streaming_content)), expected)
+
+        response = self.get(stream="ndjson")
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line) for line in lines], expected)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class LedgerBulkCreateTests(TestCase):
+    def setUp(self):
+        category_cache.invalidate()
+        self.user = CustomUser.objects.create_user(email="owner@livflow.co.kr", password="password")
+        self.store = Store.objects.create(user=self.user, name="본점")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse("ledger-transaction-bulk-create", args=[self.store.id])
+
+    def rows(self, count):
+        return [
+            {
+                "type": ("income", "expense")[i % 2], "category": ("매출", "재료비", "임대료")[i % 3],
+                "detail": f"{i}번", "cost": 1000 + i, "date": {"year": 2025, "month": 3, "day": 1 + i % 28},
+            }
+            for i in range(count)
+        ]
+
+    def assertRollupsMatchRebuild(self):
+        def rollups():
+            return (
+                sorted(DailySummary.objects.filter(count__gt=0).values_list("date", "transaction_type", "category_id", "total", "count")),
+                list(LedgerBalance.objects.values_list("income_total", "expense_total")),
+            )
+        incremental = rollups()
+        rebuild_daily_summaries()
+        self.assertEqual(incremental, rollups())
+
+    def test_json_array_insert_updates_rollups(self):
+        response = self.client.post(self.url, self.rows(40), format="json")
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["created"], 40)
+        self.assertEqual(Transaction.objects.filter(store=self.store).count(), 40)
+        self.assertRollupsMatchRebuild()
+
+    def test_query_count_does_not_grow_with_rows(self):
+        self.client.post(self.url, self.rows(3), format="json")  # 카테고리 생성
+
+        # 상점 확인, SAVEPOINT, 카테고리 조회, 거래 INSERT, 잔액 UPDATE, 집계 잠금 조회/UPDATE, 새 집계 INSERT(SAVEPOINT 포함), RELEASE
+        with self.assertNumQueries(11):
+            self.client.post(self.url, self.rows(6), format="json")
+        with self.assertNumQueries(11):
+            self.client.post(self.url, self.rows(60), format="json")
+
+    def test_csv_upload_with_bom(self):
+        content = "\ufeffdate,type,category,detail,cost\n2025-03-14,income,매출,점심,12000\n2025-03-15,expense,재료비,,3000\n".encode("utf-8")
+        upload = SimpleUploadedFile("ledger.csv", content, content_type="text/csv")
+
+        response = self.client.post(self.url, {"file": upload}, format="multipart")
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(LedgerBalance.objects.get(store=self.store).balance, Decimal("9000.00"))
+
+    def test_csv_missing_column_is_bad_request(self):
+        upload = SimpleUploadedFile("ledger.csv", "date,type,detail\n2025-03-14,income,점심\n".encode("utf-8"), content_type="text/csv")
+
+        response = self.client.post(self.url, {"file": upload}, format="multipart")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("category, cost", response.json()["error"])
+
+    def test_one_bad_row_saves_nothing(self):
+        rows = self.rows(3)
+        rows[1]["cost"] = "x"
+
+        response = self.client.post(self.url, rows, format="json")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([error["row"] for error in response.json()["errors"]], [1])
+        self.assertIn("cost", response.json()["errors"][0]["errors"])
+        self.assertFalse(Transaction.objects.exists())
+        self.assertFalse(DailySummary.objects.exists())
+
+    def test_other_users_store_is_not_found(self):
+        other = Store.objects.create(user=CustomUser.objects.create_user(email="other@livflow.co.kr", password="password"), name="남의 가게")
+
+        response = self.client.post(reverse("ledger-transaction-bulk-create", args=[other.id]), self.rows(1), format="json")
+
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(Transaction.objects.exists())
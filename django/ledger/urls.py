@@ -1,17 +1,22 @@
 from django.urls import path
 from .views import (
-    LedgerTransactionListCreateView, LedgerTransactionDetailView,
+    LedgerTransactionListCreateView, LedgerTransactionDetailView, LedgerTransactionBulkCreateView,
     CategoryListCreateView, CategoryDetailView,
-    LedgerCalendarView
+    LedgerCalendarView, LedgerReportView, LedgerBalanceView, LedgerExportView, LedgerSummaryCacheStatsView
 )
 
 urlpatterns = [
     # 🔹 거래 내역 관련 API
     path('<uuid:store_id>/transactions/', LedgerTransactionListCreateView.as_view(), name='ledger-transaction-list-create'),
+    path('<uuid:store_id>/transactions/bulk/', LedgerTransactionBulkCreateView.as_view(), name='ledger-transaction-bulk-create'),
     path('<uuid:store_id>/transactions/<uuid:transaction_id>/', LedgerTransactionDetailView.as_view(), name='ledger-transaction-detail'),
 
     # 🔹 캘린더 및 일별 거래 조회 API
     path('<uuid:store_id>/calendar/', LedgerCalendarView.as_view(), name='ledger-calendar'),
+    path('<uuid:store_id>/report/', LedgerReportView.as_view(), name='ledger-report'),
+    path('<uuid:store_id>/balance/', LedgerBalanceView.as_view(), name='ledger-balance'),
+    path('export/', LedgerExportView.as_view(), name='ledger-export'),
+    path('summary-cache/stats/', LedgerSummaryCacheStatsView.as_view(), name='ledger-summary-cache-stats'),
 
     # 🔹 카테고리 관련 API
     path('categories/', CategoryListCreateView.as_view(), name='category-list-create'),
@@ -0,0 +1,230 @@
+from datetime import date
+from decimal import Decimal
+from django.db.models import BooleanField, Case, Max, Min, Q, Sum, Value, When
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek
+from django.utils.dateparse import parse_date
+from ledger.models import DailySummary, LedgerBalance
+
+UNCATEGORIZED = "미분류"
+TRANSACTION_TYPES = ("income", "expense")
+REPORT_BUCKETS = {"day": TruncDay, "week": TruncWeek, "month": TruncMonth}
+MAX_REPORT_DAYS = {"day": 366, "week": 366 * 3, "month": 366 * 10}
+
+
+def month_range(year, month):
+    """
+    해당 월의 [1일, 다음 달 1일) 날짜 범위.
+    date__year/date__month(EXTRACT)와 달리 (store, date) 인덱스 범위 검색이 가능하다.
+    잘못된 연/월이면 ValueError.
+    """
+    start = date(year, month, 1)
+    end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return start, end
+
+
+def parse_optional_date(value):
+    """ 'YYYY-MM-DD' 문자열 → date (빈 값이면 None). 형식이 잘못되면 ValueError """
+    if not value:
+        return None
+    parsed = parse_date(value)
+    if parsed is None:
+        raise ValueError(f"잘못된 날짜 형식입니다: {value}")
+    return parsed
+
+
+def rank_categories(category_totals, top_n):
+    """ {거래 유형: {카테고리명: 합계}} → 유형별 상위 N개 차트 항목 (수입 → 지출 순) """
+    chart = []
+    for trans_type in TRANSACTION_TYPES:
+        ranked = sorted(category_totals.get(trans_type, {}).items(), key=lambda item: item[1], reverse=True)[:top_n]
+        chart += [
+            {"type": trans_type, "category": name, "cost": float(total)}
+            for name, total in ranked
+        ]
+    return chart
+
+
+def add_category_total(category_totals, trans_type, category_name, total):
+    """ 카테고리별 합계 누적 (카테고리 없음은 '미분류'로 합침) """
+    name = category_name or UNCATEGORIZED
+    by_name = category_totals.setdefault(trans_type, {})
+    by_name[name] = by_name.get(name, Decimal("0")) + (total or Decimal("0"))
+
+
+def get_month_summary(store, year, month, top_n=5):
+    """
+    특정 월의 달력(일별 수입/지출 여부) & 차트(총합, 카테고리 상위 N개) 데이터 계산.
+    일별 집계(DailySummary)를 (날짜, 거래 유형, 카테고리) 기준으로 한 번 조회해 모든 값을 만든다.
+    """
+    start, end = month_range(year, month)
+    rows = (
+        DailySummary.objects.filter(store=store, date__gte=start, date__lt=end, count__gt=0)
+        .values("date", "transaction_type", "category__name")
+        .annotate(total=Sum("total"))
+        .order_by()
+    )
+
+    day_summary = {}
+    totals = {"income": Decimal("0"), "expense": Decimal("0")}
+    category_totals = {}
+
+    for row in rows:
+        trans_type = row["transaction_type"]
+        if trans_type not in totals:
+            continue
+
+        summary = day_summary.setdefault(row["date"].day, {"hasIncome": False, "hasExpense": False})
+        summary["hasIncome" if trans_type == "income" else "hasExpense"] = True
+
+        totals[trans_type] += row["total"] or Decimal("0")
+        add_category_total(category_totals, trans_type, row["category__name"], row["total"])
+
+    return {
+        "days": [{"day": day, **day_summary[day]} for day in sorted(day_summary)],
+        "chart": {
+            "totalIncome": totals["income"] or 0,
+            "totalExpense": totals["expense"] or 0,
+            "categories": rank_categories(category_totals, top_n),
+        },
+    }
+
+
+def get_monthly_charts(stores, year, month, top_n=5):
+    """
+    여러 상점의 특정 월 카테고리 차트를 한 번의 그룹 쿼리로 계산.
+    반환값: {store_id: [{"type", "category", "cost"}, ...]} (거래가 없는 상점은 빈 리스트)
+    """
+    start, end = month_range(year, month)
+    rows = (
+        DailySummary.objects.filter(store__in=stores, date__gte=start, date__lt=end, count__gt=0)
+        .values("store_id", "transaction_type", "category__name")
+        .annotate(total=Sum("total"))
+        .order_by()
+    )
+
+    totals_by_store = {}
+    for row in rows:
+        if row["transaction_type"] not in TRANSACTION_TYPES:
+            continue
+        category_totals = totals_by_store.setdefault(row["store_id"], {})
+        add_category_total(category_totals, row["transaction_type"], row["category__name"], row["total"])
+
+    return {
+        store.id: rank_categories(totals_by_store.get(store.id, {}), top_n)
+        for store in stores
+    }
+
+
+def shift_year(value, years):
+    """ 연도만 이동 (2월 29일은 2월 28일로) """
+    try:
+        return value.replace(year=value.year + years)
+    except ValueError:
+        return value.replace(year=value.year + years, day=28)
+
+
+def get_range_report(store, start, end, bucket="month", compare_previous_year=False):
+    """
+    [start, end] 기간의 수입/지출을 일/주/월 단위 구간과 카테고리별로 집계.
+    일별 집계(DailySummary)를 DB에서 Trunc 함수로 구간화해 한 번의 그룹 쿼리로 계산한다.
+    compare_previous_year=True면 1년 전 같은 기간도 같은 쿼리로 읽어 "previous"에 담는다.
+    기간이 거꾸로이거나 구간 단위에 비해 너무 길면 ValueError.
+    """
+    if bucket not in REPORT_BUCKETS:
+        raise ValueError("bucket은 day, week, month 중 하나여야 합니다.")
+    if start > end:
+        raise ValueError("start는 end보다 늦을 수 없습니다.")
+    if (end - start).days >= MAX_REPORT_DAYS[bucket]:
+        raise ValueError(f"{bucket} 단위 조회 기간은 최대 {MAX_REPORT_DAYS[bucket]}일입니다.")
+
+    periods = Q(date__gte=start, date__lte=end)
+    if compare_previous_year:
+        previous_start, previous_end = shift_year(start, -1), shift_year(end, -1)
+        if previous_end >= start:
+            raise ValueError("전년 비교는 1년 이내 기간만 가능합니다.")
+        periods |= Q(date__gte=previous_start, date__lte=previous_end)
+
+    rows = (
+        DailySummary.objects.filter(periods, store=store, count__gt=0)
+        .annotate(
+            period=REPORT_BUCKETS[bucket]("date"),
+            is_previous=Case(When(date__lt=start, then=Value(True)), default=Value(False), output_field=BooleanField()),
+        )
+        .values("period", "is_previous", "transaction_type", "category__name")
+        .annotate(total=Sum("total"))
+        .order_by("period")
+    )
+
+    current, previous = {}, {}
+    for row in rows:
+        trans_type = row["transaction_type"]
+        if trans_type not in TRANSACTION_TYPES:
+            continue
+
+        # 구간 시작일은 start 이전일 수 있으므로 (주/월 단위) 원래 날짜 기준으로 기간 구분
+        series = previous if row["is_previous"] else current
+        bucket_data = series.setdefault(row["period"], {"totals": {"income": Decimal("0"), "expense": Decimal("0")}, "categories": {}})
+        bucket_data["totals"][trans_type] += row["total"] or Decimal("0")
+        add_category_total(bucket_data["categories"], trans_type, row["category__name"], row["total"])
+
+    def serialize(series):
+        return [
+            {
+                "period": period.isoformat(),
+                "income": float(series[period]["totals"]["income"]),
+                "expense": float(series[period]["totals"]["expense"]),
+                "categories": rank_categories(series[period]["categories"], top_n=None),
+            }
+            for period in sorted(series)
+        ]
+
+    report = {
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "bucket": bucket,
+        "buckets": serialize(current),
+    }
+    if compare_previous_year:
+        report["previous"] = serialize(previous)
+    return report
+
+
+def _totals_by_type(summaries):
+    """ 일별 집계 쿼리셋 → (수입 합계, 지출 합계) """
+    totals = {"income": Decimal("0"), "expense": Decimal("0")}
+    for row in summaries.values("transaction_type").annotate(total=Sum("total")).order_by():
+        if row["transaction_type"] in totals:
+            totals[row["transaction_type"]] += row["total"]
+    return totals["income"], totals["expense"]
+
+
+def get_balance(store, as_of=None):
+    """
+    상점의 누적 수입/지출/잔액.
+    현재 값은 잔액 행(LedgerBalance) 하나로 읽는다.
+    as_of(포함)가 주어지면 집계 기간(첫 날 ~ 마지막 날) 중 더 짧은 쪽만 합산한다:
+    as_of가 앞쪽이면 as_of까지의 일별 집계를 더하고, 뒤쪽이면 잔액 행에서 as_of 이후 일별 집계를 뺀다.
+    """
+    summaries = DailySummary.objects.filter(store=store)
+    if as_of is None:
+        balance = LedgerBalance.objects.filter(store=store).first() or LedgerBalance(store=store)
+        income_total, expense_total = balance.income_total, balance.expense_total
+    else:
+        bounds = summaries.aggregate(first=Min("date"), last=Max("date"))  # (store, date) 인덱스로 양 끝만 조회
+        if bounds["first"] is None or as_of < bounds["first"]:
+            income_total = expense_total = Decimal("0")
+        elif as_of - bounds["first"] <= bounds["last"] - as_of:
+            income_total, expense_total = _totals_by_type(summaries.filter(date__lte=as_of))
+        else:
+            balance = LedgerBalance.objects.filter(store=store).first() or LedgerBalance(store=store)
+            later_income, later_expense = (
+                _totals_by_type(summaries.filter(date__gt=as_of)) if as_of < bounds["last"] else (0, 0)
+            )
+            income_total = balance.income_total - later_income
+            expense_total = balance.expense_total - later_expense
+
+    return {
+        "income_total": income_total,
+        "expense_total": expense_total,
+        "balance": income_total - expense_total,
+    }
@@ -1,18 +1,33 @@
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from django.shortcuts import get_object_or_404
+from django.utils.dateparse import parse_date
+from django.core.exceptions import ValidationError
+from django.http import StreamingHttpResponse
 from store.models import Store  
 from ledger.models import Transaction
 from ledger.models import Category
-from ledger.serializers import TransactionSerializer, CategorySerializer
+from ledger.serializers import TransactionSerializer, CategorySerializer, TransactionImportSerializer
+from ledger.cache import get_category, get_cached_month_summary, get_summary_cache_stats
+from ledger.imports import MAX_IMPORT_ROWS, import_transactions, read_csv_rows
+from ledger.exports import export_rows, stream_csv, stream_xlsx
+from ledger.utils import get_balance, get_range_report, month_range, parse_optional_date
+from ledger.pagination import paginate_by_keyset, parse_page_size, stream_serialized
+from ledger.rollups import (
+    summary_key, record_transaction_created, record_transaction_updated, record_transaction_deleted
+)
 from datetime import datetime
-from django.db.models import Sum
 from datetime import date
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 from django.db import transaction
+import logging
+
+
+logger = logging.getLogger(__name__)
 
 
 #  거래 내역 목록 조회 & 생성
@@ -21,6 +36,14 @@ class LedgerTransactionListCreateView(APIView):
     
     @swagger_auto_schema(
         operation_summary="특정 상점의 모든 거래 내역 조회",
+        manual_parameters=[
+            openapi.Parameter("year", openapi.IN_QUERY, description="조회할 연도", type=openapi.TYPE_INTEGER, required=True),
+            openapi.Parameter("month", openapi.IN_QUERY, description="조회할 월", type=openapi.TYPE_INTEGER, required=True),
+            openapi.Parameter("day", openapi.IN_QUERY, description="조회할 일", type=openapi.TYPE_INTEGER, required=False),
+            openapi.Parameter("limit", openapi.IN_QUERY, description="페이지 크기 (지정 시 커서 페이지네이션 응답)", type=openapi.TYPE_INTEGER, required=False),
+            openapi.Parameter("cursor", openapi.IN_QUERY, description="이전 응답의 next_cursor", type=openapi.TYPE_STRING, required=False),
+            openapi.Parameter("stream", openapi.IN_QUERY, description="json 또는 ndjson 스트리밍 응답", type=openapi.TYPE_STRING, required=False),
+        ],
         responses={200: TransactionSerializer(many=True)}
     )    
 #'<uuid:store_id>/transactions/
@@ -31,22 +54,44 @@ class LedgerTransactionListCreateView(APIView):
         month = request.GET.get("month")
         day = request.GET.get("day")
 
-        print(f"📌 [DEBUG] 요청된 파라미터 - year: {year}, month: {month}, day: {day}")
-
         try:
             year = int(year)
             month = int(month)
             day = int(day) if day else None
-        except ValueError:
+            start, end = month_range(year, month)
+            target_date = date(year, month, day) if day else None
+        except (TypeError, ValueError):
             return Response({"error": "year, month, day는 숫자여야 합니다."}, status=status.HTTP_400_BAD_REQUEST)
 
-        # ledger.models.Transaction을 조회하도록 변경
-        transactions = Transaction.objects.filter(store=store, date__year=year, date__month=month).order_by("created_at")
-        if day:
-            transactions = transactions.filter(date__day=day)
+        # 날짜 범위 조건 → (store, date, transaction_type) 인덱스 범위 검색
+        if target_date:
+            transactions = Transaction.objects.filter(store=store, date=target_date)
+        else:
+            transactions = Transaction.objects.filter(store=store, date__gte=start, date__lt=end)
+        transactions = transactions.select_related("category").order_by("created_at", "id")
+
+        # 스트리밍 응답 (JSON 배열 또는 NDJSON, 청크 단위 직렬화)
+        stream = request.GET.get("stream")
+        if stream in ("json", "ndjson"):
+            content_type = "application/x-ndjson" if stream == "ndjson" else "application/json"
+            return StreamingHttpResponse(
+                stream_serialized(transactions, TransactionSerializer, ndjson=stream == "ndjson"),
+                content_type=content_type,
+            )
+
+        # 커서 페이지네이션 응답 (limit 또는 cursor 지정 시)
+        cursor = request.GET.get("cursor")
+        if cursor or request.GET.get("limit"):
+            try:
+                page_size = parse_page_size(request.GET.get("limit"))
+                page, next_cursor = paginate_by_keyset(transactions, cursor, page_size)
+            except ValueError:
+                return Response({"error": "limit은 숫자, cursor는 올바른 값이어야 합니다."}, status=status.HTTP_400_BAD_REQUEST)
 
-        # print(f"📌 [DEBUG] SQL Query: {transactions.query}")  
-        # print(f"📌 [DEBUG] 필터링된 거래 개수: {transactions.count()}")  
+            return Response({
+                "results": TransactionSerializer(page, many=True).data,
+                "next_cursor": next_cursor,
+            }, status=status.HTTP_200_OK)
 
         serializer = TransactionSerializer(transactions, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
@@ -63,32 +108,76 @@ class LedgerTransactionListCreateView(APIView):
 
 
     def post(self, request, store_id):
-        """ 거래 내역 생성 (트랜잭션 강제 커밋 추가) """
+        """ 거래 내역 생성 (상점 소유권 확인 → 카테고리 해석 → INSERT + 일별 집계 반영) """
+        store = get_object_or_404(Store, id=store_id, user=request.user)
+
         data = request.data.copy()
         data["store_id"] = str(store_id) 
         serializer = TransactionSerializer(data=data, context={"request": request})
         if serializer.is_valid():
             try:
-                with transaction.atomic():  # 트랜잭션 강제 적용
-                    transaction_obj = serializer.save()
-
-                    #  DB에 즉시 반영 확인
-                    transaction_obj.refresh_from_db()
-                    # print(f"📌 [DEBUG] 저장된 Transaction - ID: {transaction_obj.id}, 날짜: {transaction_obj.date}")
-
-                    #  저장 후 즉시 DB에서 다시 조회
-                    db_check = Transaction.objects.filter(id=transaction_obj.id).exists()
-                    if not db_check:
-                        print(f"⚠️ [ERROR] `ledger_transaction` 테이블이 아니라 다른 테이블에 저장되었을 가능성 있음!")
+                with transaction.atomic():  # 거래 저장과 일별 집계 반영을 함께 커밋
+                    transaction_obj = serializer.save(store=store)
+                    record_transaction_created(transaction_obj)
 
                 return Response(TransactionSerializer(transaction_obj).data, status=status.HTTP_201_CREATED)
 
-            except Exception as e:
-                print(f"⚠️ [ERROR] 트랜잭션 저장 실패: {e}")
+            except Exception:
+                logger.exception("거래 내역 저장 실패")
                 return Response({"error": "트랜잭션 저장 중 오류 발생"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+#  거래 내역 대량 등록 (JSON 배열 또는 CSV 업로드)
+class LedgerTransactionBulkCreateView(APIView):
+    permission_classes = [IsAuthenticated]
+    parser_classes = (JSONParser, MultiPartParser, FormParser)
+
+    @swagger_auto_schema(
+        operation_summary="거래 내역 대량 등록",
+        operation_description=(
+            "JSON 배열([{type, category, detail, cost, date}]) 또는 CSV 파일(file, 헤더: date,type,category,detail,cost)을 받아 "
+            "한 트랜잭션으로 일괄 저장합니다. 한 행이라도 잘못되면 아무것도 저장하지 않고 행별 오류를 반환합니다."
+        ),
+        responses={201: "등록된 거래 수와 ID 목록", 400: "행별 유효성 검사 오류"}
+    )
+
+#/ledger/{storeId}/transactions/bulk
+    def post(self, request, store_id):
+        store = get_object_or_404(Store, id=store_id, user=request.user)
+
+        uploaded_file = request.FILES.get("file")
+        if uploaded_file:
+            try:
+                rows = read_csv_rows(uploaded_file)
+            except ValueError as e:
+                return Response({"error": f"CSV 파일을 읽을 수 없습니다: {e}"}, status=status.HTTP_400_BAD_REQUEST)
+        else:
+            rows = request.data
+            if not isinstance(rows, list):
+                return Response({"error": "거래 내역 배열 또는 CSV 파일(file)이 필요합니다."}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not rows:
+            return Response({"error": "등록할 거래 내역이 없습니다."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(rows) > MAX_IMPORT_ROWS:
+            return Response({"error": f"한 번에 최대 {MAX_IMPORT_ROWS}건까지 등록할 수 있습니다."}, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = TransactionImportSerializer(data=rows, many=True)
+        if not serializer.is_valid():
+            errors = [
+                {"row": index, "errors": row_errors}
+                for index, row_errors in enumerate(serializer.errors)
+                if row_errors
+            ]
+            return Response({"errors": errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        transactions = import_transactions(request.user, store, serializer.validated_data)
+        return Response({
+            "created": len(transactions),
+            "transaction_ids": [str(t.id) for t in transactions],
+        }, status=status.HTTP_201_CREATED)
+
+
 #  특정 거래 내역 조회, 수정, 삭제
 class LedgerTransactionDetailView(APIView):  
     permission_classes = [IsAuthenticated]
@@ -117,7 +206,6 @@ class LedgerTransactionDetailView(APIView):
     def put(self, request, store_id, transaction_id):
         """ ✅ 특정 거래 내역 수정 """
         store = get_object_or_404(Store, id=store_id, user=request.user)
-        transaction = get_object_or_404(Transaction, id=transaction_id, store=store)
 
         # 요청 데이터 복사 후 category 처리
         data = request.data.copy()
@@ -129,18 +217,23 @@ class LedgerTransactionDetailView(APIView):
                 # 숫자이면 기존 Category ID로 조회
                 category = get_object_or_404(Category, id=int(category_input))
             else:
-                # 문자열이면 카테고리명으로 조회 or 생성
-                category, _ = Category.objects.get_or_create(name=category_input)
+                # 문자열이면 카테고리명으로 조회 or 생성 (이름→ID 캐시)
+                category = get_category(category_input)
 
             data["category"] = category.id  # ForeignKey에는 ID 저장
 
-        serializer = TransactionSerializer(transaction, data=data, partial=True, context={"request": request})
-        
-        if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data, status=status.HTTP_200_OK)
+        with transaction.atomic():
+            # 수정 전 키/금액은 잠근 행에서 읽음 (동시 수정 시 같은 이전 값으로 증감을 두 번 반영하지 않도록)
+            transaction_obj = get_object_or_404(Transaction.objects.select_for_update(), id=transaction_id, store=store)
+            serializer = TransactionSerializer(transaction_obj, data=data, partial=True, context={"request": request})
+            if not serializer.is_valid():
+                return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+            old_key, old_amount = summary_key(transaction_obj), transaction_obj.amount
+            transaction_obj = serializer.save()
+            record_transaction_updated(old_key, old_amount, transaction_obj)
+
+        return Response(serializer.data, status=status.HTTP_200_OK)
 
     @swagger_auto_schema(
         operation_summary="특정 거래 내역 삭제",
@@ -150,8 +243,11 @@ class LedgerTransactionDetailView(APIView):
     def delete(self, request, store_id, transaction_id):
         """ 특정 거래 내역 삭제 """
         store = get_object_or_404(Store, id=store_id, user=request.user)
-        transaction = get_object_or_404(Transaction, id=transaction_id, store=store)
-        transaction.delete()
+        with transaction.atomic():
+            # 잠근 뒤 삭제 (동시에 삭제 요청이 오면 나중 요청은 404 → 집계를 두 번 빼지 않음)
+            transaction_obj = get_object_or_404(Transaction.objects.select_for_update(), id=transaction_id, store=store)
+            transaction_obj.delete()
+            record_transaction_deleted(transaction_obj)
         return Response({"message": "삭제되었습니다."}, status=status.HTTP_204_NO_CONTENT)
 
 
@@ -259,6 +355,8 @@ class LedgerCalendarView(APIView):
         try:
             year = int(year)
             month = int(month)
+            month_range(year, month)
+            target_date = date(year, month, int(day)) if day else None
         except ValueError:
             return Response({"error": "year와 month는 필수 값이며, 숫자여야 합니다."}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -266,19 +364,10 @@ class LedgerCalendarView(APIView):
         # 상점 확인
         store = get_object_or_404(Store, id=store_id, user=request.user)
 
-        # 거래 필터링
-        filters = {"store": store, "date__year": year, "date__month": month}
-        if day:
-            filters["date__day"] = day  # day 필터 추가
-
-        transactions = Transaction.objects.filter(**filters)
-
-        print(f"📌 [DEBUG] SQL Query: {transactions.query}")  # 실제 SQL 확인
-        print(f"📌 [DEBUG] 필터링된 거래 개수: {transactions.count()}")  # 데이터 개수 확인
-        print(f"📌 [DEBUG] 필터링된 거래 목록: {list(transactions.values('date', 'amount', 'transaction_type'))}")  # 실제 데이터 확인
-
         if day:
             # 특정 날짜의 거래 내역 응답
+            transactions = Transaction.objects.filter(store=store, date=target_date).select_related("category")
+
             response_data = [
                 {
                     "transaction_id": str(t.id),
@@ -290,53 +379,137 @@ class LedgerCalendarView(APIView):
                 for t in transactions
             ]
         else:
-            # 특정 월의 달력 & 차트 데이터 응답
-            day_summary = {}
-            for t in transactions:
-                trans_day = t.date.day
-                if trans_day not in day_summary:
-                    day_summary[trans_day] = {"hasIncome": False, "hasExpense": False}
+            # 특정 월의 달력 & 차트 데이터 응답 (그룹 쿼리 1회)
+            response_data = get_cached_month_summary(store, year, month)
 
-                if t.transaction_type == "income":
-                    day_summary[trans_day]["hasIncome"] = True
-                else:
-                    day_summary[trans_day]["hasExpense"] = True
+        return Response(response_data, status=status.HTTP_200_OK)
 
-            days_list = [{"day": d, **summary} for d, summary in day_summary.items()]
 
-            income_summary = transactions.filter(transaction_type="income").values("category__name").annotate(
-                total=Sum("amount")
-            ).order_by("-total")[:5]
 
-            expense_summary = transactions.filter(transaction_type="expense").values("category__name").annotate(
-                total=Sum("amount")
-            ).order_by("-total")[:5]
 
-            category_data = [
-                {
-                    "type": "income",
-                    "category": c["category__name"] if c["category__name"] else "미분류",
-                    "cost": float(c["total"])
-                }
-                for c in income_summary
-            ] + [
-                {
-                    "type": "expense",
-                    "category": c["category__name"] if c["category__name"] else "미분류",
-                    "cost": float(c["total"])
-                }
-                for c in expense_summary
-            ]
+# ✅ 기간별 수입/지출 리포트 (일/주/월 구간, 전년 동기 비교)
+class LedgerReportView(APIView):
+    permission_classes = [IsAuthenticated]
 
-            response_data = {
-                "days": days_list,
-                "chart": {
-                    "totalIncome": transactions.filter(transaction_type="income").aggregate(Sum("amount"))["amount__sum"] or 0,
-                    "totalExpense": transactions.filter(transaction_type="expense").aggregate(Sum("amount"))["amount__sum"] or 0,
-                    "categories": category_data,
-                }
-            }
+    @swagger_auto_schema(
+        operation_summary="기간별 수입/지출 리포트 조회",
+        manual_parameters=[
+            openapi.Parameter("start", openapi.IN_QUERY, description="시작일 (YYYY-MM-DD)", type=openapi.TYPE_STRING, required=True),
+            openapi.Parameter("end", openapi.IN_QUERY, description="종료일 (YYYY-MM-DD, 포함)", type=openapi.TYPE_STRING, required=True),
+            openapi.Parameter("bucket", openapi.IN_QUERY, description="day, week, month (기본 month)", type=openapi.TYPE_STRING, required=False),
+            openapi.Parameter("compare", openapi.IN_QUERY, description="previous_year 지정 시 전년 동기 함께 반환", type=openapi.TYPE_STRING, required=False),
+        ],
+        responses={200: "구간별 수입/지출 합계와 카테고리별 금액 반환"}
+    )
+    def get(self, request, store_id):
+        store = get_object_or_404(Store, id=store_id, user=request.user)
 
-        return Response(response_data, status=status.HTTP_200_OK)
+        try:
+            start = parse_date(request.GET.get("start") or "")
+            end = parse_date(request.GET.get("end") or "")
+        except ValueError:
+            start = end = None
+        if not start or not end:
+            return Response({"error": "start와 end는 YYYY-MM-DD 형식이어야 합니다."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            report = get_range_report(
+                store, start, end,
+                bucket=request.GET.get("bucket", "month"),
+                compare_previous_year=request.GET.get("compare") == "previous_year",
+            )
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+        return Response(report, status=status.HTTP_200_OK)
 
+
+# ✅ 상점 잔액 조회 (현재 또는 특정 날짜 기준)
+class LedgerBalanceView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_summary="상점 누적 잔액 조회",
+        manual_parameters=[
+            openapi.Parameter("date", openapi.IN_QUERY, description="기준일 (YYYY-MM-DD, 포함). 생략 시 현재", type=openapi.TYPE_STRING, required=False),
+        ],
+        responses={200: "income_total, expense_total, balance 반환"}
+    )
+    def get(self, request, store_id):
+        store = get_object_or_404(Store, id=store_id, user=request.user)
+
+        try:
+            as_of = parse_optional_date(request.GET.get("date"))
+        except ValueError:
+            return Response({"error": "date는 YYYY-MM-DD 형식이어야 합니다."}, status=status.HTTP_400_BAD_REQUEST)
+
+        balance = get_balance(store, as_of)
+        return Response({
+            "date": as_of.isoformat() if as_of else None,
+            **{key: float(value) for key, value in balance.items()},
+        }, status=status.HTTP_200_OK)
+
+
+# ✅ 거래 내역 CSV/XLSX 내보내기 (여러 상점, 스트리밍)
+class LedgerExportView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_summary="거래 내역 CSV/XLSX 내보내기",
+        manual_parameters=[
+            openapi.Parameter("store", openapi.IN_QUERY, description="상점 ID (여러 번 지정 가능, 생략 시 내 모든 상점)", type=openapi.TYPE_STRING, required=False),
+            openapi.Parameter("start", openapi.IN_QUERY, description="시작일 (YYYY-MM-DD)", type=openapi.TYPE_STRING, required=False),
+            openapi.Parameter("end", openapi.IN_QUERY, description="종료일 (YYYY-MM-DD, 포함)", type=openapi.TYPE_STRING, required=False),
+            openapi.Parameter("file_format", openapi.IN_QUERY, description="csv 또는 xlsx (기본 csv)", type=openapi.TYPE_STRING, required=False),
+        ],
+        responses={200: "CSV 또는 XLSX 파일 (스트리밍)"}
+    )
+    def get(self, request):
+        file_format = request.GET.get("file_format", "csv")
+        if file_format not in ("csv", "xlsx"):
+            return Response({"error": "file_format은 csv 또는 xlsx여야 합니다."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            start = parse_optional_date(request.GET.get("start"))
+            end = parse_optional_date(request.GET.get("end"))
+        except ValueError:
+            return Response({"error": "start와 end는 YYYY-MM-DD 형식이어야 합니다."}, status=status.HTTP_400_BAD_REQUEST)
+
+        # 상점 소유권 확인 (지정한 상점 중 하나라도 내 상점이 아니면 404)
+        stores = Store.objects.filter(user=request.user)
+        store_ids = set(request.GET.getlist("store"))
+        if store_ids:
+            try:
+                stores = list(stores.filter(id__in=store_ids))
+            except ValidationError:
+                stores = []
+            if len(stores) != len(store_ids):
+                return Response({"error": "상점을 찾을 수 없습니다."}, status=status.HTTP_404_NOT_FOUND)
+
+        rows = export_rows(stores, start, end)
+        if file_format == "xlsx":
+            response = StreamingHttpResponse(
+                stream_xlsx(rows),
+                content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            )
+        else:
+            response = StreamingHttpResponse(stream_csv(rows), content_type="text/csv; charset=utf-8")
+
+        response["Content-Disposition"] = f'attachment; filename="ledger.{file_format}"'
+        return response
+
+
+# ✅ 월 요약 캐시 적중률 조회 (운영자용)
+class LedgerSummaryCacheStatsView(APIView):
+    permission_classes = [IsAdminUser]
+
+    @swagger_auto_schema(
+        operation_summary="가계부 월 요약 캐시 적중/미적중 횟수 조회 (관리자)",
+        responses={200: "hits, misses, hit_rate 반환"}
+    )
+    def get(self, request):
+        try:
+            return Response(get_summary_cache_stats(), status=status.HTTP_200_OK)
+        except Exception:
+            logger.exception("가계부 요약 캐시 통계 조회 실패")
+            return Response({"error": "캐시에 접근할 수 없습니다."}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
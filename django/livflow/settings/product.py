@@ -85,6 +85,15 @@ REDIS_HOST = os.getenv("REDIS_HOST", "redis")  # Docker 컨테이너에서는 "r
 REDIS_PORT = int(os.getenv("REDIS_PORT", 6379))
 REDIS_DB = int(os.getenv("REDIS_DB", 0))  # 기본 DB 인덱스
 
+# Django cache (Redis) - 가계부 카테고리 캐시 등 워커 간 공유 캐시
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": f"redis://{REDIS_HOST}:{REDIS_PORT}/{REDIS_DB}",
+        "KEY_PREFIX": "livflow",
+    }
+}
+
 
 # Static files
 STATIC_URL = '/static/'
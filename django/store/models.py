@@ -1,7 +1,6 @@
 import uuid
 from django.db import models
 from users.models import CustomUser
-from django.utils.timezone import now
 
 
 # 카테고리 모델 정의
@@ -11,7 +10,11 @@ class Category(models.Model):
     def __str__(self):
         return self.name
 
-# 가계부 거래 내역 모델
+# 가계부 거래 내역 모델 (레거시)
+# ⚠️ API는 ledger_transaction에만 기록한다. 남은 행은 배포 시 `manage.py backfill_ledger`가
+# `copy_store_transactions`(옮긴 행은 삭제)로 ledger_transaction에 옮긴다.
+# TODO: 모든 환경에서 store_transaction이 빈 것을 확인한 뒤 이 모델과 get_totals 위임 메서드를 삭제하고,
+#       backfill_ledger의 레거시 이동 단계와 copy_store_transactions 명령도 함께 제거한다.
 class Transaction(models.Model):
     
     TRANSACTION_TYPES = [
@@ -34,39 +37,15 @@ class Transaction(models.Model):
 
     @classmethod
     def get_totals(cls, user, store=None):
-        """
-        해당 사용자의 전체 수입과 지출을 집계.
-        특정 가게(store)를 지정하면 해당 가게의 총합 반환.
-        """
-        filters = {'user': user}
-        if store:
-            filters['store'] = store
-
-        income_total = cls.objects.filter(**filters, transaction_type='income').aggregate(total=models.Sum('amount'))['total'] or 0
-        expense_total = cls.objects.filter(**filters, transaction_type='expense').aggregate(total=models.Sum('amount'))['total'] or 0
-        balance = income_total - expense_total
-
-        return {
-            'income_total': income_total,
-            'expense_total': expense_total,
-            'balance': balance
-        }
+        """ ✅ 가계부(ledger) 데이터 기준으로 이동 → ledger.models.Transaction.get_totals """
+        from ledger.models import Transaction as LedgerTransaction
+        return LedgerTransaction.get_totals(user, store)
 
     @classmethod
     def get_current_month_totals(cls, user, store):
-        """
-        현재 월의 카테고리별 거래 합산
-        """
-        today = now()
-        transactions = cls.objects.filter(
-            user=user, store=store,
-            date__year=today.year, date__month=today.month
-        ).values('transaction_type', 'category__name').annotate(total=models.Sum('amount'))
-
-        return [
-            {"type": t["transaction_type"], "category": t["category__name"], "cost": t["total"]}
-            for t in transactions
-        ]
+        """ ✅ 가계부(ledger) 데이터 기준으로 이동 → ledger.models.Transaction.get_current_month_totals """
+        from ledger.models import Transaction as LedgerTransaction
+        return LedgerTransaction.get_current_month_totals(user, store)
 
 # 가게 모델 정의
 class Store(models.Model):
@@ -81,17 +60,16 @@ class Store(models.Model):
 
     def get_ledger_summary(self):
         """
-        해당 가게의 카테고리별 수입/지출 총합을 계산
+        해당 가게의 카테고리별 수입/지출 총합을 계산 (가계부 일별 집계 기준, 그룹 쿼리 1회)
         """
-        income = Transaction.objects.filter(
-            user=self.user, store=self, transaction_type='income'
-        ).values('category__name').annotate(total_income=models.Sum('amount'))
+        from ledger.models import DailySummary
 
-        expense = Transaction.objects.filter(
-            user=self.user, store=self, transaction_type='expense'
-        ).values('category__name').annotate(total_expense=models.Sum('amount'))
+        rows = DailySummary.objects.filter(
+            store=self, count__gt=0
+        ).values("transaction_type", "category__name").annotate(total=models.Sum("total")).order_by()
 
-        return {
-            'income': {item['category__name']: item['total_income'] for item in income},
-            'expense': {item['category__name']: item['total_expense'] for item in expense}
-        }
+        summary = {"income": {}, "expense": {}}
+        for row in rows:
+            if row["transaction_type"] in summary:
+                summary[row["transaction_type"]][row["category__name"]] = row["total"]
+        return summary
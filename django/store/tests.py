@@ -1,3 +1,127 @@
-from django.test import TestCase
+from datetime import date
+from io import StringIO
+from decimal import Decimal
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from users.models import CustomUser
+from store.models import Store, Transaction as StoreTransaction
+from ledger.models import Category, Transaction
+from ledger.rollups import rebuild_daily_summaries
+from ledger.tests import LOCMEM_CACHES
 
-# Create your tests here.
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class StoreListViewTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(email="owner@livflow.co.kr", password="password")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.categories = [Category.objects.create(name=f"카테고리{i}") for i in range(7)]
+
+    def create_store(self, name):
+        store = Store.objects.create(user=self.user, name=name)
+        today = date.today()
+        for i, category in enumerate(self.categories):
+            for transaction_type in ("income", "expense"):
+                Transaction.objects.create(
+                    user=self.user, store=store, category=category,
+                    transaction_type=transaction_type, amount=Decimal(100 + i), date=today,
+                )
+        return store
+
+    def rebuild(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            rebuild_daily_summaries()
+
+    def test_chart_contains_top_five_per_type(self):
+        store = self.create_store("본점")
+        self.rebuild()
+
+        response = self.client.get(reverse("store-list-create"))
+
+        self.assertEqual(response.status_code, 200)
+        [data] = response.json()["stores"]
+        self.assertEqual(data["store_id"], str(store.id))
+        self.assertEqual([c["type"] for c in data["chart"]], ["income"] * 5 + ["expense"] * 5)
+        self.assertEqual([c["cost"] for c in data["chart"][:5]], [106.0, 105.0, 104.0, 103.0, 102.0])
+
+    def test_query_count_does_not_grow_with_stores(self):
+        self.create_store("본점")
+        self.rebuild()
+        with self.assertNumQueries(2):
+            self.client.get(reverse("store-list-create"))
+
+        for i in range(5):
+            self.create_store(f"지점{i}")
+        self.rebuild()
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("store-list-create"))
+
+        self.assertEqual(len(response.json()["stores"]), 6)
+
+    def test_cached_charts_skip_summary_query(self):
+        self.create_store("본점")
+        self.rebuild()
+        first = self.client.get(reverse("store-list-create")).json()
+
+        # 상점 목록 조회만 실행되고 차트는 캐시에서 읽음
+        with self.assertNumQueries(1):
+            second = self.client.get(reverse("store-list-create")).json()
+
+        self.assertEqual(first, second)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class LegacyTransactionCopyTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(email="owner@livflow.co.kr", password="password")
+        self.store = Store.objects.create(user=self.user, name="본점")
+        self.category = Category.objects.create(name="매출")
+
+    def create_legacy(self):
+        return StoreTransaction.objects.create(
+            user=self.user, store=self.store, category=self.category,
+            transaction_type="income", amount=Decimal("5000"), date=date.today(),
+        )
+
+    def test_copy_moves_rows_and_summaries(self):
+        legacy = self.create_legacy()
+        Transaction.objects.create(
+            user=self.user, store=self.store, category=self.category,
+            transaction_type="expense", amount=Decimal("2000"), date=date.today(),
+        )
+
+        call_command("copy_store_transactions", "--dry-run", stdout=StringIO())
+        self.assertTrue(StoreTransaction.objects.filter(id=legacy.id).exists())
+
+        call_command("copy_store_transactions", stdout=StringIO())
+
+        self.assertFalse(StoreTransaction.objects.exists())  # 옮긴 레거시 행은 삭제
+        copied = Transaction.objects.get(id=legacy.id)
+        self.assertEqual(copied.created_at, legacy.created_at)
+        self.assertEqual(Transaction.objects.filter(store=self.store).count(), 2)
+        self.assertEqual(self.store.get_ledger_summary(), {"income": {"매출": Decimal("5000.00")}, "expense": {"매출": Decimal("2000.00")}})
+        self.assertEqual(
+            StoreTransaction.get_totals(self.user, self.store),
+            {"income_total": Decimal("5000.00"), "expense_total": Decimal("2000.00"), "balance": Decimal("3000.00")},
+        )
+
+    def test_rerun_does_not_restore_deleted_transactions(self):
+        legacy = self.create_legacy()
+        call_command("copy_store_transactions", stdout=StringIO())
+
+        Transaction.objects.filter(id=legacy.id).delete()  # 옮긴 뒤 사용자가 삭제
+        call_command("copy_store_transactions", stdout=StringIO())
+
+        self.assertFalse(Transaction.objects.filter(id=legacy.id).exists())
+
+    def test_deploy_backfill_moves_legacy_rows(self):
+        legacy = self.create_legacy()
+
+        call_command("backfill_ledger", stdout=StringIO())
+
+        self.assertFalse(StoreTransaction.objects.exists())
+        self.assertTrue(Transaction.objects.filter(id=legacy.id).exists())
+        self.assertEqual(StoreTransaction.get_totals(self.user, self.store)["income_total"], Decimal("5000.00"))
@@ -7,11 +7,10 @@ from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 from django.contrib.auth import get_user_model
 from .models import Store  
-from ledger.models import Transaction 
+from ledger.cache import get_cached_monthly_charts
 from .serializers import StoreSerializer
 from rest_framework_simplejwt.tokens import RefreshToken
 from datetime import datetime
-from django.db.models import Sum
 
 class StoreListView(APIView):
     permission_classes = [IsAuthenticated]
@@ -24,50 +23,23 @@ class StoreListView(APIView):
     
     def get(self, request):
         """ 현재 로그인한 사용자의 모든 가게 목록 + 현재 월의 Ledger 차트 정보 포함 """
-        stores = Store.objects.filter(user=request.user).order_by("created_at")
-        response_data = []
+        stores = list(Store.objects.filter(user=request.user).order_by("created_at"))
 
         # 현재 연/월 기준
         now = datetime.now()
-        target_year = now.year
-        target_month = now.month
 
-        for store in stores:
-            # 수입(income) 상위 3개 카테고리
-            income_transactions = Transaction.objects.filter(
-                store=store, transaction_type="income",
-                date__year=target_year, date__month=target_month
-            ).values("transaction_type", "category__name").annotate(
-                total=Sum("amount")
-            ).order_by("-total")[:5]
+        # 모든 가게의 수입/지출 상위 5개 카테고리를 한 번에 조회
+        charts = get_cached_monthly_charts(stores, now.year, now.month)
 
-            # 지출(expense) 상위 3개 카테고리
-            expense_transactions = Transaction.objects.filter(
-                store=store, transaction_type="expense",
-                date__year=target_year, date__month=target_month
-            ).values("transaction_type", "category__name").annotate(
-                total=Sum("amount")
-            ).order_by("-total")[:5]
-
-            # 수입/지출 합쳐서 chart 데이터 생성
-            transactions = list(income_transactions) + list(expense_transactions)
-
-            chart_data = [
-                {
-                    "type": t["transaction_type"],
-                    "category": t["category__name"] or "미분류",
-                    "cost": float(t["total"])
-                }
-                for t in transactions
-            ]
-
-            # 최종 응답 데이터 구성
-            response_data.append({
+        response_data = [
+            {
                 "store_id": str(store.id),
                 "name": store.name,
                 "address": store.address,
-                "chart": chart_data  # 현재 월 기준 차트
-            })
+                "chart": charts[store.id]  # 현재 월 기준 차트
+            }
+            for store in stores
+        ]
 
         return Response({"stores": response_data}, status=status.HTTP_200_OK)
 